@@ -0,0 +1,129 @@
+"""
+Compare the embedding backends (torch, onnx, onnx-int8) on the chunks of the
+evaluation articles: encode throughput, and how closely each backend's
+retrieval matches the torch backend (top-k overlap for every predefined query,
+and the cosine similarity between the two backends' chunk vectors).
+
+    python benchmarks/embedding_backends.py --articles 20 --threads 4 --batch-size 32
+    python benchmarks/embedding_backends.py --output benchmarks/results/embedding_backends.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from pipeline_benchmark import DATASET, load_articles  # noqa: E402
+
+
+def encode(embedder, texts: list[str], batch_size: int) -> tuple[np.ndarray, float]:
+    start = time.perf_counter()
+    vectors = embedder.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+    elapsed = time.perf_counter() - start
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True), elapsed
+
+
+def top_k_agreement(reference: tuple[np.ndarray, np.ndarray], candidate: tuple[np.ndarray, np.ndarray],
+                    doc_ranges: list[tuple[int, int]], top_k: int) -> float:
+    """Mean fraction of the reference top-k chunks that the candidate also retrieves, per query and article."""
+    ref_chunks, ref_queries = reference
+    cand_chunks, cand_queries = candidate
+    overlaps = []
+    for start, end in doc_ranges:
+        k = min(top_k, end - start)
+        ref_top = np.argsort(-(ref_queries @ ref_chunks[start:end].T), axis=1)[:, :k]
+        cand_top = np.argsort(-(cand_queries @ cand_chunks[start:end].T), axis=1)[:, :k]
+        overlaps.extend(len(set(r) & set(c)) / k for r, c in zip(ref_top, cand_top))
+    return float(np.mean(overlaps))
+
+
+def run_benchmark(args) -> dict:
+    from chonkie import RecursiveChunker
+
+    from src.core.embedders import load_embedder
+    from src.questions.predefined_questions import load_predefined_questions
+
+    articles = load_articles(args.dataset, args.articles)
+    queries = load_predefined_questions()["analyst_queries"]
+
+    # Chunk once so every backend embeds exactly the same texts
+    chunker = RecursiveChunker(chunk_size=args.chunk_size)
+    chunks, doc_ranges = [], []
+    for article in articles:
+        start = len(chunks)
+        chunks.extend(c if isinstance(c, str) else c.text for c in chunker.chunk(article))
+        doc_ranges.append((start, len(chunks)))
+
+    results = {
+        "config": {"articles": len(articles), "chunks": len(chunks), "model": args.model,
+                   "batch_size": args.batch_size, "threads": args.threads, "top_k": args.top_k},
+        "backends": {},
+    }
+    vectors = {}
+    for backend in args.backends:
+        start = time.perf_counter()
+        embedder = load_embedder(args.model, backend, num_threads=args.threads)
+        load_seconds = time.perf_counter() - start
+        # Warm-up so lazy session initialisation is not measured
+        embedder.encode(chunks[:args.batch_size], batch_size=args.batch_size)
+
+        chunk_vectors, seconds = encode(embedder, chunks, args.batch_size)
+        query_vectors, _ = encode(embedder, queries, args.batch_size)
+        vectors[backend] = (chunk_vectors, query_vectors)
+        results["backends"][backend] = {
+            "load_seconds": load_seconds,
+            "encode_seconds": seconds,
+            "chunks_per_second": len(chunks) / seconds,
+        }
+
+    reference = args.backends[0]
+    for backend, stats in results["backends"].items():
+        stats["speedup"] = results["backends"][reference]["encode_seconds"] / stats["encode_seconds"]
+        stats["mean_cosine_to_reference"] = float(np.mean(np.sum(vectors[backend][0] * vectors[reference][0], axis=1)))
+        stats[f"top{args.top_k}_agreement"] = top_k_agreement(vectors[reference], vectors[backend],
+                                                               doc_ranges, args.top_k)
+    return results
+
+
+def print_report(results: dict):
+    config = results["config"]
+    print(f"Articles: {config['articles']}  chunks: {config['chunks']}  model: {config['model']}  "
+          f"batch size: {config['batch_size']}  threads: {config['threads'] or 'default'}")
+    agreement_key = f"top{config['top_k']}_agreement"
+    print(f"{'backend':<12}{'chunks/s':>10}{'speedup':>10}{'cosine':>10}{agreement_key:>16}")
+    for backend, stats in results["backends"].items():
+        print(f"{backend:<12}{stats['chunks_per_second']:>10.1f}{stats['speedup']:>10.2f}"
+              f"{stats['mean_cosine_to_reference']:>10.4f}{stats[agreement_key]:>16.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dataset", default=DATASET)
+    parser.add_argument("--articles", type=int, default=0, help="Limit the number of articles (0 = all).")
+    parser.add_argument("--model", default="multi-qa-MiniLM-L6-cos-v1")
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx", "onnx-int8"],
+                        help="Backends to compare; the first one is the reference.")
+    parser.add_argument("--chunk-size", type=int, default=512)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--threads", type=int, help="ONNX Runtime intra-op threads.")
+    parser.add_argument("--top-k", type=int, default=4)
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    args = parser.parse_args()
+
+    results = run_benchmark(args)
+    print_report(results)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Startup benchmark: measures the import time of each cyber-rag module (and of
+`main.py --help`) in fresh interpreters, so that a heavy dependency creeping
+back into an eager import path shows up as a regression.
+
+    python benchmarks/import_time.py --output benchmarks/results/import_time.json
+    python benchmarks/import_time.py --baseline benchmarks/results/import_time.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+MODULES = [
+    "main",
+    "src.core.rag_pipeline",
+    "src.core.retriever",
+    "src.core.generator",
+    "src.core.batch",
+    "src.parser.html_parser",
+    "src.llm_api",
+    "src.server.api",
+]
+
+# Modules that must not be loaded just by importing `main`
+HEAVY_MODULES = ["torch", "sentence_transformers", "faiss", "docling", "pytesseract", "langchain_ibm"]
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{"seconds": elapsed, "heavy_modules": heavy}}))
+"""
+
+
+def measure_import(module: str, repeat: int) -> dict:
+    timings, heavy = [], []
+    for _ in range(repeat):
+        completed = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=REPO_ROOT, capture_output=True, text=True,
+        )
+        if completed.returncode != 0:
+            return {"error": completed.stderr.strip().splitlines()[-1] if completed.stderr else "failed"}
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        timings.append(result["seconds"])
+        heavy = result["heavy_modules"]
+    return {"median_seconds": statistics.median(timings), "min_seconds": min(timings), "heavy_modules": heavy}
+
+
+def measure_cli_help(repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        completed = subprocess.run([sys.executable, "main.py", "--help"],
+                                   cwd=REPO_ROOT, capture_output=True, text=True)
+        if completed.returncode != 0:
+            return {"error": completed.stderr.strip().splitlines()[-1] if completed.stderr else "failed"}
+        timings.append(time.perf_counter() - start)
+    return {"median_seconds": statistics.median(timings), "min_seconds": min(timings)}
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name, {})
+        if "median_seconds" not in result or "median_seconds" not in base:
+            continue
+        # Ignore noise on imports that are a few milliseconds either way
+        limit = base["median_seconds"] * (1 + tolerance) + 0.01
+        if result["median_seconds"] > limit:
+            regressions.append(
+                f"{name}: {result['median_seconds']:.3f}s vs baseline {base['median_seconds']:.3f}s"
+            )
+    if results.get("main", {}).get("heavy_modules"):
+        regressions.append(f"main imports heavy modules: {results['main']['heavy_modules']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per measurement.")
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    parser.add_argument("--baseline", help="Fail if any import is slower than in this results file.")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed relative slowdown against the baseline.")
+    args = parser.parse_args()
+
+    results = {module: measure_import(module, args.repeat) for module in MODULES}
+    results["main.py --help"] = measure_cli_help(args.repeat)
+
+    for name, result in results.items():
+        if "error" in result:
+            print(f"{name:<28} ERROR {result['error']}")
+        else:
+            heavy = ", ".join(result.get("heavy_modules", []))
+            print(f"{name:<28} {result['median_seconds'] * 1000:8.1f} ms  {heavy}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
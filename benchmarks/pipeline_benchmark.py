@@ -0,0 +1,164 @@
+"""
+Offline end-to-end benchmark: replays the articles of the evaluation dataset
+through RAGPipeline.run_all against the stub Ollama server, and reports
+per-stage timings (chunk, embed, search, generate), throughput and latency
+percentiles.
+
+    python benchmarks/pipeline_benchmark.py --output benchmarks/results/pipeline.json
+    python benchmarks/pipeline_benchmark.py --baseline benchmarks/results/pipeline.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_ollama_server import start_stub_server  # noqa: E402
+
+DATASET = os.path.join(REPO_ROOT, "evaluation", "blogs_with_questions_and_answers.jsonl")
+
+
+def summarize(values: list[float]) -> dict:
+    if not values:
+        return {"count": 0}
+    arr = np.asarray(values)
+    return {
+        "count": len(values),
+        "total_seconds": float(arr.sum()),
+        "mean_seconds": float(arr.mean()),
+        "p50_seconds": float(np.percentile(arr, 50)),
+        "p95_seconds": float(np.percentile(arr, 95)),
+        "p99_seconds": float(np.percentile(arr, 99)),
+    }
+
+
+def load_articles(path: str, limit: int) -> list[str]:
+    articles = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            article = json.loads(line).get("outputs", {}).get("article_textual_content")
+            if article:
+                articles.append(article.strip())
+    return articles[:limit] if limit else articles
+
+
+def run_benchmark(args) -> dict:
+    server = start_stub_server(latency=args.latency, token_rate=args.token_rate,
+                               completion_tokens=args.completion_tokens)
+    # Must be set before the ollama client is imported
+    os.environ["OLLAMA_HOST"] = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ["LLM_PROVIDER"] = "ollama"
+    os.environ["LLM_MODEL"] = "stub"
+
+    from src.core.rag_pipeline import RAGPipeline
+    from src.core.telemetry import get_telemetry
+
+    pipeline = RAGPipeline(use_embedding_cache=args.with_caches, use_answer_cache=args.with_caches)
+    telemetry = get_telemetry()
+    # Drop the spans recorded while the pipeline was being built
+    telemetry.reset()
+
+    articles = load_articles(args.dataset, args.articles)
+    article_latencies = []
+
+    def _run(article: str):
+        start = time.perf_counter()
+        results = pipeline.run_all(article)
+        article_latencies.append(time.perf_counter() - start)
+        return len(results)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.article_workers) as pool:
+        n_questions = sum(pool.map(_run, articles))
+    wall = time.perf_counter() - start
+    server.shutdown()
+
+    return {
+        "config": {
+            "articles": len(articles),
+            "article_workers": args.article_workers,
+            "latency": args.latency,
+            "token_rate": args.token_rate,
+            "completion_tokens": args.completion_tokens,
+            "with_caches": args.with_caches,
+            "max_concurrency": pipeline.max_concurrency,
+        },
+        "wall_seconds": wall,
+        "throughput": {
+            "articles_per_second": len(articles) / wall,
+            "questions_per_second": n_questions / wall,
+        },
+        "article_latency": summarize(article_latencies),
+        "stages": telemetry.stage_summary(),
+        "counters": telemetry.counters(),
+        "peak_rss_bytes": telemetry.peak_rss_bytes(),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for key in ("p50_seconds", "p95_seconds", "p99_seconds"):
+        current, base = results["article_latency"].get(key), baseline["article_latency"].get(key)
+        if current is not None and base is not None and current > base * (1 + tolerance):
+            regressions.append(f"article latency {key}: {current:.3f}s vs baseline {base:.3f}s")
+    current = results["throughput"]["articles_per_second"]
+    base = baseline["throughput"]["articles_per_second"]
+    if current < base * (1 - tolerance):
+        regressions.append(f"throughput: {current:.3f} vs baseline {base:.3f} articles/s")
+    return regressions
+
+
+def print_report(results: dict):
+    print(f"Articles: {results['config']['articles']}  wall: {results['wall_seconds']:.2f}s  "
+          f"throughput: {results['throughput']['articles_per_second']:.2f} articles/s, "
+          f"{results['throughput']['questions_per_second']:.2f} questions/s")
+    print(f"{'stage':<10}{'count':>7}{'total s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for stage, stats in [("article", results["article_latency"]), *results["stages"].items()]:
+        if not stats.get("count"):
+            continue
+        print(f"{stage:<10}{stats['count']:>7}{stats['total_seconds']:>10.2f}"
+              f"{stats['p50_seconds'] * 1000:>10.1f}{stats['p95_seconds'] * 1000:>10.1f}"
+              f"{stats['p99_seconds'] * 1000:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dataset", default=DATASET)
+    parser.add_argument("--articles", type=int, default=0, help="Limit the number of articles (0 = all).")
+    parser.add_argument("--article-workers", type=int, default=1, help="Articles processed concurrently.")
+    parser.add_argument("--latency", type=float, default=0.3, help="Stub time to first token, in seconds.")
+    parser.add_argument("--token-rate", type=float, default=40.0, help="Stub tokens per second.")
+    parser.add_argument("--completion-tokens", type=int, default=40, help="Stub tokens per answer.")
+    parser.add_argument("--with-caches", action="store_true", help="Keep the embedding and answer caches on.")
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    parser.add_argument("--baseline", help="Compare against a previously saved results file.")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative slowdown.")
+    args = parser.parse_args()
+
+    results = run_benchmark(args)
+    print_report(results)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if not regressions:
+            print("No regressions against the baseline.")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
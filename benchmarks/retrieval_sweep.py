@@ -0,0 +1,196 @@
+"""
+Retrieval-only benchmark and parameter sweep, no LLM involved. For every
+configuration in the grid (embedding model x chunk size x threshold x top_k)
+it indexes each article of the evaluation dataset and checks whether the
+retrieved chunks contain the ground-truth answer:
+
+  - a chunk counts as relevant when it contains at least --min-overlap of the
+    answer's content words (the reference answers are paraphrased, so exact
+    matching would miss most of them)
+  - recall@k: share of questions with a relevant chunk among the first k
+  - coverage@k: share of answer content words found in the first k chunks
+  - MRR: mean reciprocal rank of the first relevant chunk
+
+It also records indexing and query latency and the index size, and writes a
+comparison table.
+
+    python benchmarks/retrieval_sweep.py --chunk-sizes 256 512 1024 --top-ks 2 4 8
+    python benchmarks/retrieval_sweep.py --models multi-qa-MiniLM-L6-cos-v1 all-MiniLM-L6-v2 \\
+        --output benchmarks/results/retrieval_sweep.json --table benchmarks/results/retrieval_sweep.md
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from pipeline_benchmark import DATASET  # noqa: E402
+
+NOT_FOUND_MARKERS = ("cannot be determined", "not mentioned", "no specific mention", "no information")
+
+STOPWORDS = frozenset("""
+    a an the and or but if of to in on at by for with from as is are was were be been being it its this that
+    these those there their they them he she we you i which who whom what when where why how not no yes
+    does do did has have had can could would should may might will also such other than then so into via
+    about over under any all some more most specifically including known malware attack used uses using
+""".split())
+
+
+def content_words(text: str) -> set:
+    return {w for w in re.findall(r"[a-z0-9][a-z0-9.\-_]*[a-z0-9]|[a-z0-9]", text.lower()) if w not in STOPWORDS}
+
+
+def load_examples(path: str, limit: int) -> list[dict]:
+    """Articles with the content words of each answerable ground-truth answer, by question position."""
+    examples = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            outputs = json.loads(line).get("outputs", {})
+            article = outputs.get("article_textual_content")
+            if not article:
+                continue
+            answers = {}
+            for i, qa in enumerate(outputs.get("qna", [])):
+                answer = qa.get("answer", "")
+                words = content_words(answer)
+                # Unanswerable questions have nothing to retrieve
+                if len(words) >= 3 and not any(marker in answer.lower() for marker in NOT_FOUND_MARKERS):
+                    answers[i] = words
+            examples.append({"article": article.strip(), "answers": answers})
+    return examples[:limit] if limit else examples
+
+
+def score_ranking(chunks: list[str], ranked: list[int], answer: set, top_ks: list[int],
+                  min_overlap: float) -> dict:
+    chunk_words = [content_words(chunks[idx]) for idx in ranked]
+    relevant = [len(answer & words) / len(answer) >= min_overlap for words in chunk_words]
+    first = next((rank for rank, hit in enumerate(relevant, 1) if hit), None)
+    scores = {"rr": 1.0 / first if first else 0.0}
+    for k in top_ks:
+        scores[f"recall@{k}"] = float(any(relevant[:k]))
+        covered = set().union(*chunk_words[:k]) if chunk_words[:k] else set()
+        scores[f"coverage@{k}"] = len(answer & covered) / len(answer)
+    return scores
+
+
+def run_config(retriever, query_vectors: np.ndarray, examples: list[dict], threshold: float,
+               top_ks: list[int], min_overlap: float) -> dict:
+    max_k = max(top_ks)
+    index_seconds, query_seconds, index_bytes, n_chunks = [], [], [], []
+    per_question = []
+    for example in examples:
+        start = time.perf_counter()
+        retriever.prepare_index(example["article"])
+        index_seconds.append(time.perf_counter() - start)
+        n_chunks.append(retriever.index.ntotal)
+        index_bytes.append(retriever.index.ntotal * retriever.index.d * 4)
+
+        start = time.perf_counter()
+        all_hits = retriever.hits_batch(query_vectors, threshold=threshold, top_k=max_k)
+        query_seconds.append(time.perf_counter() - start)
+
+        for i, answer in example["answers"].items():
+            if i >= len(all_hits):
+                continue
+            ranked = [idx for _, idx in all_hits[i]]
+            per_question.append(score_ranking(retriever.chunks, ranked, answer, top_ks, min_overlap))
+
+    result = {
+        "articles": len(examples),
+        "questions": len(per_question),
+        "mrr": float(np.mean([q["rr"] for q in per_question])) if per_question else 0.0,
+        "mean_chunks": float(np.mean(n_chunks)),
+        "index_ms_p50": float(np.percentile(index_seconds, 50) * 1000),
+        "index_ms_p95": float(np.percentile(index_seconds, 95) * 1000),
+        "query_ms_p50": float(np.percentile(query_seconds, 50) * 1000),
+        "index_kib_mean": float(np.mean(index_bytes) / 1024),
+    }
+    for k in top_ks:
+        result[f"recall@{k}"] = float(np.mean([q[f"recall@{k}"] for q in per_question])) if per_question else 0.0
+        result[f"coverage@{k}"] = float(np.mean([q[f"coverage@{k}"] for q in per_question])) if per_question else 0.0
+    return result
+
+
+def run_sweep(args) -> list[dict]:
+    from src.core.dedup import ChunkDeduplicator
+    from src.core.retriever import RAGRetriever
+    from src.questions.predefined_questions import load_predefined_questions
+
+    examples = load_examples(args.dataset, args.articles)
+    queries = load_predefined_questions()["analyst_queries"]
+    rows = []
+    for model in args.models:
+        for chunk_size in args.chunk_sizes:
+            # No embedding cache: indexing latency is part of what is measured
+            retriever = RAGRetriever(model_name=model, chunk_size=chunk_size, cache=None,
+                                     deduplicator=None if args.no_dedup else ChunkDeduplicator())
+            query_vectors = retriever.encode_queries(queries)
+            for threshold in args.thresholds:
+                result = run_config(retriever, query_vectors, examples, threshold, args.top_ks, args.min_overlap)
+                for k in args.top_ks:
+                    rows.append({
+                        "model": model, "chunk_size": chunk_size, "threshold": threshold, "top_k": k,
+                        "recall": result[f"recall@{k}"], "coverage": result[f"coverage@{k}"],
+                        **{key: value for key, value in result.items() if "@" not in key},
+                    })
+                print(f"done: {model} chunk_size={chunk_size} threshold={threshold}", file=sys.stderr)
+    return rows
+
+
+def format_table(rows: list[dict], recall_tolerance: float) -> str:
+    """Markdown table, best recall first; '*' marks the fastest configuration within tolerance of it."""
+    rows = sorted(rows, key=lambda r: (-r["recall"], r["index_ms_p50"]))
+    best_recall = rows[0]["recall"] if rows else 0.0
+    eligible = [r for r in rows if r["recall"] >= best_recall - recall_tolerance]
+    fastest = min(eligible, key=lambda r: (r["index_ms_p50"] + r["query_ms_p50"], r["top_k"])) if eligible else None
+
+    lines = [
+        "| | model | chunk size | threshold | top_k | recall@k | coverage@k | MRR | chunks | index ms p50 | index ms p95 | query ms p50 | index KiB |",
+        "|---|---|---|---|---|---|---|---|---|---|---|---|---|",
+    ]
+    for r in rows:
+        lines.append(
+            f"| {'*' if r is fastest else ''} | {r['model']} | {r['chunk_size']} | {r['threshold']} | {r['top_k']} "
+            f"| {r['recall']:.3f} | {r['coverage']:.3f} | {r['mrr']:.3f} | {r['mean_chunks']:.1f} "
+            f"| {r['index_ms_p50']:.1f} | {r['index_ms_p95']:.1f} | {r['query_ms_p50']:.2f} | {r['index_kib_mean']:.1f} |"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dataset", default=DATASET)
+    parser.add_argument("--articles", type=int, default=0, help="Limit the number of articles (0 = all).")
+    parser.add_argument("--models", nargs="+", default=["multi-qa-MiniLM-L6-cos-v1"])
+    parser.add_argument("--chunk-sizes", nargs="+", type=int, default=[256, 512, 1024])
+    parser.add_argument("--thresholds", nargs="+", type=float, default=[0.2])
+    parser.add_argument("--top-ks", nargs="+", type=int, default=[2, 4, 8])
+    parser.add_argument("--min-overlap", type=float, default=0.5,
+                        help="Share of answer content words a chunk must contain to count as relevant.")
+    parser.add_argument("--no-dedup", action="store_true", help="Embed chunks without de-duplication.")
+    parser.add_argument("--recall-tolerance", type=float, default=0.02,
+                        help="Recall loss accepted when marking the fastest configuration.")
+    parser.add_argument("--output", help="Write every row as JSON to this file.")
+    parser.add_argument("--table", help="Write the markdown comparison table to this file.")
+    args = parser.parse_args()
+
+    rows = run_sweep(args)
+    table = format_table(rows, args.recall_tolerance)
+    print(table)
+
+    for path, content in ((args.output, json.dumps(rows, indent=2)), (args.table, table)):
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(content)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Local stand-in for the Ollama HTTP API, used to benchmark the pipeline without
+a real model. Every completion waits `latency` seconds (time to first token)
+and then emits `completion_tokens` tokens at `token_rate` tokens per second.
+
+    python benchmarks/stub_ollama_server.py --port 11500 --latency 0.3 --token-rate 40
+"""
+import argparse
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_ANSWER_WORDS = ("The answer cannot be determined from the provided context. " * 20).split()
+
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    latency = 0.3
+    token_rate = 40.0
+    completion_tokens = 40
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload: dict, status: int = 200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json({"models": [{"name": "stub", "model": "stub"}]})
+        elif self.path == "/api/version":
+            self._send_json({"version": "0.0.0-stub"})
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def do_POST(self):
+        if self.path not in ("/api/chat", "/api/generate"):
+            self._send_json({"error": "not found"}, status=404)
+            return
+
+        request = self._read_json()
+        model = request.get("model", "stub")
+        stream = request.get("stream", True)
+        prompt_text = request.get("prompt") or " ".join(
+            m.get("content", "") for m in request.get("messages", [])
+        )
+        prompt_tokens = len(prompt_text.split())
+        # An empty /api/generate request only loads the model
+        n_tokens = self.completion_tokens if (prompt_text or self.path == "/api/chat") else 0
+        words = STUB_ANSWER_WORDS[:n_tokens]
+
+        def _chunk(content: str, done: bool) -> dict:
+            chunk = {"model": model, "created_at": datetime.now(timezone.utc).isoformat(), "done": done}
+            if self.path == "/api/chat":
+                chunk["message"] = {"role": "assistant", "content": content}
+            else:
+                chunk["response"] = content
+            if done:
+                chunk.update({"done_reason": "stop", "prompt_eval_count": prompt_tokens,
+                              "eval_count": len(words)})
+            return chunk
+
+        time.sleep(self.latency)
+        if not stream:
+            time.sleep(len(words) / self.token_rate)
+            self._send_json(_chunk(" ".join(words), done=True))
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        for i, word in enumerate(words):
+            self.wfile.write((json.dumps(_chunk(word if i == 0 else " " + word, done=False)) + "\n").encode("utf-8"))
+            self.wfile.flush()
+            time.sleep(1.0 / self.token_rate)
+        self.wfile.write((json.dumps(_chunk("", done=True)) + "\n").encode("utf-8"))
+        self.wfile.flush()
+
+
+def start_stub_server(host: str = "127.0.0.1", port: int = 0, latency: float = 0.3,
+                      token_rate: float = 40.0, completion_tokens: int = 40) -> ThreadingHTTPServer:
+    """Start the stub in a background thread. Port 0 picks a free port."""
+    handler = type("ConfiguredStubOllamaHandler", (StubOllamaHandler,), {
+        "latency": latency, "token_rate": token_rate, "completion_tokens": completion_tokens,
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--latency", type=float, default=0.3, help="Seconds before the first token.")
+    parser.add_argument("--token-rate", type=float, default=40.0, help="Generated tokens per second.")
+    parser.add_argument("--completion-tokens", type=int, default=40, help="Tokens per answer.")
+    args = parser.parse_args()
+
+    server = start_stub_server(args.host, args.port, args.latency, args.token_rate, args.completion_tokens)
+    print(f"Stub Ollama listening on http://{args.host}:{server.server_address[1]}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
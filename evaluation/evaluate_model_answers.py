@@ -3,6 +3,7 @@ import re
 from dotenv import load_dotenv
 from src.llm_api import get_chat_llm_client
 from src.core.generator import LLMGenerator
+from src.core.answer_cache import AnswerCache
 
 load_dotenv()
 
@@ -182,7 +183,7 @@ def run_without_rag_and_evaluate(examples, llm_generator, eval_client):
 def evaluate_without_rag():
     raw_examples = extract_examples_from_jsonl("blogs_with_questions_and_answers.jsonl")
 
-    llm_generator = LLMGenerator(prompt_name="extract_qa")  # Uses model from .env
+    llm_generator = LLMGenerator(prompt_name="extract_qa", cache=AnswerCache())  # Uses model from .env
     eval_client = get_chat_llm_client(model_name="meta-llama/llama-3-3-70b-instruct")
 
     results = run_without_rag_and_evaluate(raw_examples, llm_generator, eval_client)
@@ -0,0 +1,226 @@
+"""
+Parallel, resumable version of evaluate_model_answers.py.
+
+Answers are generated and graded by bounded worker pools, and every graded
+answer is appended to a JSONL checkpoint as soon as it arrives. Re-running the
+same command skips the (url, question) pairs already in the checkpoint (failed
+answer or grading calls are not checkpointed and are retried), and the dataset
+can be split into shards that run in separate processes.
+
+    python evaluation/run_evaluation.py --mode rag --workers 8
+    python evaluation/run_evaluation.py --mode rag --processes 4
+"""
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
+
+EVALUATION_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(EVALUATION_DIR, "..")))
+
+from evaluate_model_answers import (  # noqa: E402
+    evaluate_answer_with_watsonx,
+    extract_examples_from_jsonl,
+    save_final_results,
+)
+from src.llm_api import get_chat_llm_client  # noqa: E402
+
+DEFAULT_OUTPUTS = {"rag": "answers_with_rag.json", "no-rag": "answers_without_rag.json"}
+ANSWER_FIELDS = {"rag": "rag_answer", "no-rag": "model_answer"}
+# Grader results that say nothing about the answer (timeout, rate limit, unparsable output)
+FAILED_EVALUATIONS = ("Error", "Invalid")
+FAILED_ANSWER = "Error generating answer."
+
+
+class CheckpointWriter:
+    """Appends one JSON record per line, flushing each so a crash loses nothing."""
+
+    def __init__(self, path: str):
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def write(self, record: dict):
+        with self._lock:
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def checkpoint_files(checkpoint: str) -> list[str]:
+    """The checkpoint itself plus the per-shard files written next to it."""
+    return [path for path in [checkpoint, *sorted(glob.glob(checkpoint + ".shard-*"))]
+            if os.path.exists(path)]
+
+
+def load_checkpoint(checkpoint: str) -> list[dict]:
+    records = []
+    for path in checkpoint_files(checkpoint):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # A line cut short by a crash; its pair is simply re-run
+                    continue
+    return records
+
+
+def is_complete(record: dict) -> bool:
+    """False for records of a failed answer or grading call, which a re-run retries."""
+    if record.get("evaluation") in FAILED_EVALUATIONS:
+        return False
+    return all(record.get(field) != FAILED_ANSWER for field in ANSWER_FIELDS.values())
+
+
+def shard_articles(examples: list[dict], shard_index: int, num_shards: int) -> dict[str, list[dict]]:
+    """Group examples by article and keep this shard's articles, in dataset order."""
+    grouped = defaultdict(list)
+    for ex in examples:
+        grouped[ex["content"]].append(ex)
+    return {article: ex_list for i, (article, ex_list) in enumerate(grouped.items())
+            if i % num_shards == shard_index}
+
+
+def _grade(eval_client, writer: CheckpointWriter, ex: dict, answer_field: str, answer: str):
+    eval_result = evaluate_answer_with_watsonx(eval_client, ex["question"], ex["ground_truth_answer"], answer)
+    if eval_result.get("evaluation") in FAILED_EVALUATIONS:
+        # Not checkpointed, so the next run grades it again
+        print(f"[{eval_result['evaluation']}] {ex['article_url']} | {ex['question']} (will be retried)")
+        return
+    writer.write({
+        "article_url": ex["article_url"],
+        "question": ex["question"],
+        "ground_truth_answer": ex["ground_truth_answer"],
+        answer_field: answer,
+        **eval_result
+    })
+    print(f"[{eval_result['evaluation']}] {ex['article_url']} | {ex['question']}")
+
+
+def run_shard(args) -> None:
+    examples = extract_examples_from_jsonl(args.dataset)
+    articles = shard_articles(examples, args.shard_index, args.num_shards)
+
+    done = {(r["article_url"], r["question"]) for r in load_checkpoint(args.checkpoint) if is_complete(r)}
+    pending = {article: [ex for ex in ex_list if (ex["article_url"], ex["question"]) not in done]
+               for article, ex_list in articles.items()}
+    pending = {article: ex_list for article, ex_list in pending.items() if ex_list}
+    print(f"Shard {args.shard_index + 1}/{args.num_shards}: "
+          f"{sum(len(v) for v in pending.values())} pairs to evaluate, "
+          f"{sum(len(v) for v in articles.values()) - sum(len(v) for v in pending.values())} already done")
+    if not pending:
+        return
+
+    eval_client = get_chat_llm_client(model_name="meta-llama/llama-3-3-70b-instruct")
+    shard_checkpoint = args.checkpoint if args.num_shards == 1 else \
+        f"{args.checkpoint}.shard-{args.shard_index}-of-{args.num_shards}"
+    writer = CheckpointWriter(shard_checkpoint)
+    answer_field = ANSWER_FIELDS[args.mode]
+
+    with ThreadPoolExecutor(max_workers=args.workers, thread_name_prefix="answer") as answer_pool, \
+            ThreadPoolExecutor(max_workers=args.workers, thread_name_prefix="grade") as grade_pool:
+        grade_futures = []
+        lock = threading.Lock()
+
+        def _submit_grade(ex: dict, answer: str):
+            with lock:
+                grade_futures.append(grade_pool.submit(_grade, eval_client, writer, ex, answer_field, answer))
+
+        if args.mode == "rag":
+            from src.core.rag_pipeline import RAGPipeline
+            pipeline = RAGPipeline()
+
+            def _answer_article(article: str, ex_list: list[dict]):
+                # The pipeline answers every predefined question, in dataset order
+                rag_outputs = pipeline.run_all(article)
+                all_questions = articles[article]
+                if len(rag_outputs) != len(all_questions):
+                    print(f"Mismatch in question count: RAG returned {len(rag_outputs)}, "
+                          f"expected {len(all_questions)}")
+                    return
+                answers = {ex["question"]: out["rag_answer"] for ex, out in zip(all_questions, rag_outputs)}
+                for ex in ex_list:
+                    _submit_grade(ex, answers[ex["question"]])
+
+            answer_futures = [answer_pool.submit(_answer_article, article, ex_list)
+                              for article, ex_list in pending.items()]
+        else:
+            from src.core.answer_cache import AnswerCache
+            from src.core.generator import LLMGenerator
+            llm_generator = LLMGenerator(prompt_name="extract_qa", cache=AnswerCache())
+
+            def _answer_question(ex: dict):
+                try:
+                    answer = llm_generator.generate_answer(ex["question"], ex["content"])
+                except Exception as e:
+                    # Left out of the checkpoint so the next run retries it
+                    print(f"Error generating answer: {e}")
+                    return
+                _submit_grade(ex, answer)
+
+            answer_futures = [answer_pool.submit(_answer_question, ex)
+                              for ex_list in pending.values() for ex in ex_list]
+
+        wait(answer_futures)
+        for future in answer_futures:
+            if future.exception() is not None:
+                print(f"Error answering: {future.exception()}")
+        with lock:
+            wait(grade_futures)
+
+    writer.close()
+
+
+def merge_results(args):
+    """Write the final JSON in dataset order from all checkpoint records."""
+    examples = extract_examples_from_jsonl(args.dataset)
+    order = {(ex["article_url"], ex["question"]): i for i, ex in enumerate(examples)}
+    records = {}
+    for record in load_checkpoint(args.checkpoint):
+        key = (record["article_url"], record["question"])
+        # A successful retry replaces a failure left by older runs, never the reverse
+        if key not in records or is_complete(record) or not is_complete(records[key]):
+            records[key] = record
+    results = sorted(records.values(), key=lambda r: order.get((r["article_url"], r["question"]), len(order)))
+    save_final_results(results, output_path=args.output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["rag", "no-rag"], default="rag")
+    parser.add_argument("--dataset", default=os.path.join(EVALUATION_DIR, "blogs_with_questions_and_answers.jsonl"))
+    parser.add_argument("--output", help="Final JSON results file (default depends on --mode).")
+    parser.add_argument("--checkpoint", help="JSONL checkpoint (default: <output>.checkpoint.jsonl).")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent answer and grading requests.")
+    parser.add_argument("--processes", type=int, default=1, help="Run this many shards as separate processes.")
+    parser.add_argument("--shard-index", type=int, default=0, help=argparse.SUPPRESS)
+    parser.add_argument("--num-shards", type=int, default=1, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    args.output = args.output or os.path.join(EVALUATION_DIR, DEFAULT_OUTPUTS[args.mode])
+    args.checkpoint = args.checkpoint or os.path.splitext(args.output)[0] + ".checkpoint.jsonl"
+
+    if args.processes > 1:
+        base_cmd = [sys.executable, os.path.abspath(__file__), "--mode", args.mode,
+                    "--dataset", args.dataset, "--output", args.output, "--checkpoint", args.checkpoint,
+                    "--workers", str(args.workers), "--num-shards", str(args.processes)]
+        shards = [subprocess.Popen(base_cmd + ["--shard-index", str(i)]) for i in range(args.processes)]
+        failed = [i for i, shard in enumerate(shards) if shard.wait() != 0]
+        if failed:
+            print(f"Shards {failed} failed; re-run the same command to resume them.")
+    else:
+        run_shard(args)
+
+    if args.num_shards == 1:
+        merge_results(args)
+
+
+if __name__ == "__main__":
+    main()
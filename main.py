@@ -2,17 +2,20 @@ import sys
 import os
 import logging
 from datetime import datetime
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 import click
 from rich.console import Console
 from rich.panel import Panel
+from rich.live import Live
 from rich import box
 import logging
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "src")))
 
-from src.core.rag_pipeline import RAGPipeline
-from src.parser.html_parser import HTMLParser
+# The pipeline and parser pull in torch, faiss and docling, so they are only
+# imported by the commands that need them; --help stays instant.
+if TYPE_CHECKING:
+    from src.core.rag_pipeline import RAGPipeline
 
 # ──────────────────────────────────────────────────────────────
 # Logging setup
@@ -38,7 +41,7 @@ def _banner():
 
 # ──────────────────────────────────────────────────────────────
 
-def _display_results(console: Console, results: list[dict], url: str):
+def _display_header(console: Console, url: str):
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     console.print(
         Panel(
@@ -49,35 +52,291 @@ def _display_results(console: Console, results: list[dict], url: str):
         )
     )
 
+
+def _question_panel(question: str, answer: str) -> Panel:
+    return Panel(f"[bold cyan]Q:[/] {question}\n\n[bold green]A:[/] {answer}", border_style="bright_black")
+
+
+def _display_results(console: Console, results: list[dict], url: str):
+    _display_header(console, url)
+
     for item in results:
         question = item.get("question", "Unknown question")
         answer = item.get("rag_answer", "No answer")
-        console.print(Panel(f"[bold cyan]Q:[/] {question}\n\n[bold green]A:[/] {answer}", border_style="bright_black"))
+        console.print(_question_panel(question, answer))
+
+
+def _stream_results(console: Console, pipeline: "RAGPipeline", content: str, url: str) -> list[dict]:
+    """Render each question's panel live while its answer is being generated."""
+    _display_header(console, url)
+    results = []
+
+    for item, tokens in pipeline.stream_all(content):
+        answer = ""
+        with Live(_question_panel(item["question"], answer), console=console,
+                  refresh_per_second=12) as live:
+            for token in tokens:
+                answer += token
+                live.update(_question_panel(item["question"], answer))
+        item["rag_answer"] = answer.strip()
+        results.append(item)
+
+    return results
+
+def _setup_instrumentation(ctx: click.Context, trace_out: Optional[str], profile: bool):
+    """Export the run's telemetry (and cProfile/tracemalloc output) when the command ends."""
+    from src.core.telemetry import get_telemetry
+
+    profiler = None
+    run_dir = None
+    if profile:
+        import cProfile
+        import tracemalloc
+
+        run_dir = os.path.join("profiles", datetime.now().strftime("%Y%m%d-%H%M%S"))
+        os.makedirs(run_dir, exist_ok=True)
+        tracemalloc.start(25)
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    def _finish():
+        telemetry = get_telemetry()
+        if profiler is not None:
+            import pstats
+            import tracemalloc
+
+            profiler.disable()
+            profiler.dump_stats(os.path.join(run_dir, "cprofile.prof"))
+            with open(os.path.join(run_dir, "cprofile.txt"), "w", encoding="utf-8") as f:
+                pstats.Stats(profiler, stream=f).sort_stats("cumulative").print_stats(50)
+
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            with open(os.path.join(run_dir, "tracemalloc.txt"), "w", encoding="utf-8") as f:
+                for stat in snapshot.statistics("lineno")[:50]:
+                    f.write(f"{stat}\n")
+
+            telemetry.export_json(os.path.join(run_dir, "trace.json"))
+            with open(os.path.join(run_dir, "metrics.prom"), "w", encoding="utf-8") as f:
+                f.write(telemetry.to_prometheus())
+            console.print(f"[dim]Profile written to {run_dir}[/]")
+        if trace_out:
+            telemetry.export_json(trace_out)
+            console.print(f"[dim]Trace written to {trace_out}[/]")
+
+    ctx.call_on_close(_finish)
 
 # ──────────────────────────────────────────────────────────────
-@click.command()
+@click.group(invoke_without_command=True)
 @click.option("--url", help="URL of the blog post to run the RAG pipeline on.")
-def extract(url: Optional[str]):
+@click.option("--no-cache", is_flag=True, help="Bypass the LLM answer cache for this run.")
+@click.option("--clear-cache", is_flag=True, help="Delete all cached LLM answers before running.")
+@click.option("--stream", is_flag=True, help="Show answers token by token as they are generated.")
+@click.option("--trace-out", type=click.Path(dir_okay=False),
+              help="Write a JSON trace of the run (per-stage spans, counters, peak RSS).")
+@click.option("--profile", is_flag=True,
+              help="Also dump cProfile, tracemalloc and trace output into ./profiles/.")
+@click.pass_context
+def cli(ctx: click.Context, url: Optional[str], no_cache: bool, clear_cache: bool, stream: bool,
+        trace_out: Optional[str], profile: bool):
+    ctx.obj = {"use_answer_cache": not no_cache}
+    if trace_out or profile:
+        _setup_instrumentation(ctx, trace_out, profile)
+    if clear_cache:
+        from src.core.answer_cache import AnswerCache
+        AnswerCache().clear()
+        console.print("[yellow]LLM answer cache cleared.[/]")
+        if ctx.invoked_subcommand is None and not url:
+            # Only clearing was asked for; don't prompt for a URL
+            return
+    if ctx.invoked_subcommand is None:
+        extract(url, use_answer_cache=not no_cache, stream=stream)
+
+
+def _build_pipeline(use_answer_cache: bool) -> "RAGPipeline":
+    from src.core.rag_pipeline import RAGPipeline
+
+    return RAGPipeline(prompt_name="extract_qa", use_answer_cache=use_answer_cache)
+
+
+def extract(url: Optional[str], use_answer_cache: bool = True, stream: bool = False):
     _banner()
     if not url:
         console.print("[yellow]No URL provided. Please enter one manually:[/]")
         url = input("Enter a blog URL: ")
 
     try:
+        from src.core.warmup import Warmup
+
+        # Load the models in the background while the article is fetched and parsed
+        warmup = Warmup(lambda: _build_pipeline(use_answer_cache))
+
+        from src.parser.html_parser import HTMLParser
+
         parser = HTMLParser(url, use_ocr=False)
         content = parser.get_textual_content()
 
-        pipeline = RAGPipeline(prompt_name="extract_qa")
-
-        answers = pipeline.run_all(content)
+        pipeline = warmup.pipeline()
 
-        _display_results(console, answers, url)
+        if stream:
+            _stream_results(console, pipeline, content, url)
+        else:
+            answers = pipeline.run_all(content)
+            _display_results(console, answers, url)
 
     except Exception as e:
         logger.error(f"[bold red]Error:[/] {str(e)}")
 
 
+@cli.command()
+@click.argument("urls", nargs=-1)
+@click.option("--urls-file", type=click.Path(exists=True, dir_okay=False),
+              help="File with one blog URL per line.")
+@click.option("--output", default="batch_results.jsonl", show_default=True,
+              help="JSONL file to append one record per article to.")
+@click.option("--fetch-workers", default=4, show_default=True,
+              help="Number of articles fetched and parsed concurrently.")
+@click.option("--generate-workers", default=2, show_default=True,
+              help="Number of articles answered by the LLM concurrently.")
+@click.option("--ocr", is_flag=True, help="Also OCR images in the articles.")
+@click.pass_obj
+def batch(obj: dict, urls: tuple[str, ...], urls_file: Optional[str], output: str,
+          fetch_workers: int, generate_workers: int, ocr: bool):
+    """Run the RAG pipeline over many blog URLs."""
+    from src.core.batch import BatchRunner, read_url_file
+    from src.core.rag_pipeline import RAGPipeline
+
+    all_urls = list(urls)
+    if urls_file:
+        all_urls.extend(read_url_file(urls_file))
+    if not all_urls:
+        raise click.UsageError("Provide URLs as arguments or with --urls-file.")
+
+    pipeline = RAGPipeline(prompt_name="extract_qa", use_answer_cache=obj["use_answer_cache"])
+    with BatchRunner(pipeline, fetch_workers=fetch_workers,
+                     generate_workers=generate_workers, use_ocr=ocr) as runner:
+        succeeded = runner.run(all_urls, output)
+
+    console.print(f"[green]{succeeded}/{len(all_urls)} articles processed.[/] Results in [cyan]{output}[/]")
+
+
+@cli.command()
+@click.option("--host", default="127.0.0.1", show_default=True, help="Interface to bind to.")
+@click.option("--port", default=8080, show_default=True, help="Port to listen on.")
+@click.option("--fetch-workers", default=4, show_default=True,
+              help="Number of articles fetched and parsed concurrently.")
+@click.option("--generate-workers", default=2, show_default=True,
+              help="Number of articles answered by the LLM concurrently.")
+@click.option("--ocr", is_flag=True, help="Also OCR images in the articles.")
+@click.pass_obj
+def serve(obj: dict, host: str, port: int, fetch_workers: int, generate_workers: int, ocr: bool):
+    """Keep the models warm and serve the pipeline over a local HTTP API."""
+    from src.core.batch import BatchRunner
+    from src.core.rag_pipeline import RAGPipeline
+    from src.core.warmup import Warmup
+    from src.parser.docling_pool import get_docling_pool
+    from src.server.api import serve as serve_api
+
+    # Load the LLM alongside the pipeline and the docling workers rather than on the first job
+    warmup = Warmup(lambda: RAGPipeline(prompt_name="extract_qa", use_answer_cache=obj["use_answer_cache"]))
+    get_docling_pool()
+    pipeline = warmup.pipeline()
+
+    console.print(f"[green]Serving on[/] [cyan]http://{host}:{port}[/] (POST /jobs, GET /jobs/<id>)")
+    with BatchRunner(pipeline, fetch_workers=fetch_workers,
+                     generate_workers=generate_workers, use_ocr=ocr) as runner:
+        serve_api(runner, host=host, port=port)
+
+
+@cli.command()
+@click.argument("urls", nargs=-1)
+@click.option("--urls-file", type=click.Path(exists=True, dir_okay=False),
+              help="File with one blog URL per line.")
+@click.option("--store", type=click.Path(file_okay=False),
+              help="Corpus store directory (default: the cache directory).")
+@click.option("--published", help="Publication date (YYYY-MM-DD) recorded for these articles.")
+@click.option("--index-type", type=click.Choice(["ivf", "hnsw"]), default="ivf", show_default=True,
+              help="ANN index used when a new store is created.")
+@click.option("--compression", type=click.Choice(["none", "sq8", "pq"]), default="sq8", show_default=True,
+              help="Vector compression used when a new store is created.")
+def ingest(urls: tuple[str, ...], urls_file: Optional[str], store: Optional[str], published: Optional[str],
+           index_type: str, compression: str):
+    """Add blog articles to the persistent cross-article corpus."""
+    from src.core.batch import read_url_file
+    from src.core.dedup import ChunkDeduplicator
+    from src.core.embedding_cache import EmbeddingCache
+    from src.core.retriever import RAGRetriever
+    from src.core.vector_store import CorpusStore
+    from src.parser.html_parser import HTMLParser
+
+    all_urls = list(urls)
+    if urls_file:
+        all_urls.extend(read_url_file(urls_file))
+    if not all_urls:
+        raise click.UsageError("Provide URLs as arguments or with --urls-file.")
+
+    retriever = RAGRetriever(cache=EmbeddingCache(), deduplicator=ChunkDeduplicator())
+    try:
+        corpus = CorpusStore(store, index_type=index_type,
+                             compression=None if compression == "none" else compression,
+                             embedder=retriever.embedder_id)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    added = 0
+    for url in all_urls:
+        content = HTMLParser(url).get_textual_content()
+        if not content:
+            console.print(f"[red]Could not extract[/] {url}")
+            continue
+        chunks, spans, embeddings = retriever.embed_document(content)
+        if corpus.add_article(content, chunks, spans, embeddings, url=url, published=published) is None:
+            console.print(f"[dim]Already ingested: {url}[/]")
+        else:
+            added += 1
+    corpus.save()
+
+    console.print(f"[green]{added} articles added.[/] The corpus holds {len(corpus)} articles in [cyan]{corpus.path}[/]")
+
+
+@cli.command()
+@click.argument("question")
+@click.option("--store", type=click.Path(file_okay=False),
+              help="Corpus store directory (default: the cache directory).")
+@click.option("--top-k", default=5, show_default=True, help="Number of chunks to retrieve.")
+@click.option("--url", "filter_url", help="Only search chunks of this article.")
+@click.option("--since", help="Only search articles published on or after this date (YYYY-MM-DD).")
+@click.option("--until", help="Only search articles published on or before this date (YYYY-MM-DD).")
+@click.option("--answer", is_flag=True, help="Also answer the question from the retrieved chunks with the LLM.")
+@click.pass_obj
+def search(obj: dict, question: str, store: Optional[str], top_k: int, filter_url: Optional[str],
+           since: Optional[str], until: Optional[str], answer: bool):
+    """Search the whole ingested corpus."""
+    from src.core.retriever import RAGRetriever
+    from src.core.vector_store import CorpusStore
+
+    retriever = RAGRetriever()
+    try:
+        corpus = CorpusStore(store, read_only=True, embedder=retriever.embedder_id)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    q_vecs = retriever.encode_queries([question])
+    hits = corpus.search(q_vecs, top_k=top_k, url=filter_url, published_after=since, published_before=until)[0]
+    if not hits:
+        console.print("[yellow]No matching chunks.[/]")
+        return
+
+    for hit in hits:
+        console.print(Panel(hit["text"], title=f"[cyan]{hit['url']}[/] [dim]{hit['published'] or ''}[/]",
+                            subtitle=f"[dim]score {hit['score']:.3f}[/]", border_style="bright_black"))
+
+    if answer:
+        from src.core.answer_cache import AnswerCache
+        from src.core.generator import LLMGenerator
+
+        generator = LLMGenerator(cache=AnswerCache() if obj["use_answer_cache"] else None)
+        context = "\n\n".join(hit["text"] for hit in hits)
+        console.print(_question_panel(question, generator.generate_answer(question, context)))
 
 
 if __name__ == "__main__":
-    extract()
+    cli()
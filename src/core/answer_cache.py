@@ -0,0 +1,88 @@
+import hashlib
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from src.core.paths import get_cache_dir
+
+
+class AnswerCache:
+    """
+    SQLite-backed cache of LLM answers. Entries are keyed by provider, model,
+    prompt template, question and retrieved context, expire after `ttl_seconds`
+    and the least recently used ones are dropped beyond `max_entries`.
+    """
+
+    def __init__(self,
+                 path: Optional[str] = None,
+                 ttl_seconds: float = 7 * 24 * 3600,
+                 max_entries: int = 50_000):
+        self.path = path or os.path.join(get_cache_dir("answers"), "answers.sqlite3")
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                " key TEXT PRIMARY KEY,"
+                " answer TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS answers_last_used ON answers (last_used)")
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per operation keeps the cache usable from
+        # any thread or event loop
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(provider: str, model: str, prompt_template: str, question: str, context: str) -> str:
+        prompt_hash = hashlib.sha256(prompt_template.encode("utf-8")).hexdigest()
+        context_hash = hashlib.sha256(context.encode("utf-8")).hexdigest()
+        h = hashlib.sha256()
+        for part in (provider, model, prompt_hash, question, context_hash):
+            h.update(part.encode("utf-8"))
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT answer, created_at FROM answers WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            answer, created_at = row
+            if now - created_at > self.ttl_seconds:
+                conn.execute("DELETE FROM answers WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE answers SET last_used = ? WHERE key = ?", (now, key))
+        return answer
+
+    def put(self, key: str, answer: str):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO answers (key, answer, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, answer, now, now),
+            )
+            conn.execute("DELETE FROM answers WHERE created_at < ?", (now - self.ttl_seconds,))
+            conn.execute(
+                "DELETE FROM answers WHERE key IN ("
+                " SELECT key FROM answers ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM answers")
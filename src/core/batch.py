@@ -0,0 +1,128 @@
+import json
+import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING, Iterable, Optional
+
+from src.parser.html_parser import HTMLParser
+
+if TYPE_CHECKING:
+    from src.core.rag_pipeline import RAGPipeline
+
+logger = logging.getLogger(__name__)
+
+
+def read_url_file(path: str) -> list[str]:
+    """Read one URL per line, skipping blank lines and `#` comments."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+class BatchRunner:
+    """
+    Runs fetch/parse, indexing and answer generation over many articles as
+    overlapping stages, each with its own bounded worker pool, sharing one
+    warm RAGPipeline and the docling worker pool.
+    """
+
+    def __init__(self,
+                 pipeline: "RAGPipeline",
+                 fetch_workers: int = 4,
+                 generate_workers: int = 2,
+                 use_ocr: bool = False):
+        self.pipeline = pipeline
+        self.use_ocr = use_ocr
+        self._fetch_pool = ThreadPoolExecutor(max_workers=fetch_workers, thread_name_prefix="fetch")
+        # The pipeline holds a single index, so indexing is serialised anyway
+        self._index_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="index")
+        self._generate_pool = ThreadPoolExecutor(max_workers=generate_workers, thread_name_prefix="generate")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        # Each stage hands work to the next from its done-callback, so the
+        # pools must be drained in stage order.
+        self._fetch_pool.shutdown(wait=True)
+        self._index_pool.shutdown(wait=True)
+        self._generate_pool.shutdown(wait=True)
+
+    def submit(self, url: Optional[str] = None, text: Optional[str] = None) -> Future:
+        """
+        Queue one article given either its URL or its already extracted text.
+        The returned future resolves to the article's output record.
+        """
+        if url is None and text is None:
+            raise ValueError("Either url or text must be provided.")
+
+        stages = [
+            (self._index_pool, self.pipeline.retrieve_all),
+            (self._generate_pool, self.pipeline.generate_all),
+        ]
+        if text is None:
+            stages.insert(0, (self._fetch_pool, self._fetch))
+
+        record = {"url": url, "started_at": time.time()}
+        result: Future = Future()
+        self._run_stages(stages, text if text is not None else url, record, result)
+        return result
+
+    def run(self, urls: Iterable[str], output_path: str) -> int:
+        """
+        Process all URLs and append one JSONL record per article to
+        `output_path` as soon as it finishes. Returns the number of successes.
+        """
+        futures = [self.submit(url=url) for url in urls]
+        succeeded = 0
+
+        with open(output_path, "a", encoding="utf-8") as f:
+            for done, future in enumerate(as_completed(futures), 1):
+                record = future.result()
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                f.flush()
+                if record["status"] == "ok":
+                    succeeded += 1
+                logger.info(f"[{done}/{len(futures)}] {record['status']}: {record['url']}")
+
+        return succeeded
+
+    def _fetch(self, url: str) -> str:
+        parser = HTMLParser(url, use_ocr=self.use_ocr)
+        content = parser.get_textual_content()
+        if not content:
+            raise ValueError("Failed to extract blog content")
+        return content
+
+    def _run_stages(self, stages: list, arg, record: dict, result: Future):
+        if not stages:
+            record["status"] = "ok"
+            record["answers"] = arg
+            self._finish(record, result)
+            return
+
+        pool, fn = stages[0]
+
+        def _next(done: Future):
+            exc = done.exception()
+            if exc is not None:
+                record["status"] = "error"
+                record["error"] = str(exc)
+                self._finish(record, result)
+                return
+            self._run_stages(stages[1:], done.result(), record, result)
+
+        try:
+            pool.submit(fn, arg).add_done_callback(_next)
+        except RuntimeError as e:
+            # Raised when the runner is closed while articles are in flight
+            record["status"] = "error"
+            record["error"] = str(e)
+            self._finish(record, result)
+
+    @staticmethod
+    def _finish(record: dict, result: Future):
+        record["elapsed_seconds"] = round(time.time() - record.pop("started_at"), 3)
+        result.set_result(record)
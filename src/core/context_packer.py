@@ -0,0 +1,94 @@
+import re
+from typing import Optional
+
+# Pieces shorter than this are not worth trimming into the remaining budget
+MIN_TRIMMED_TOKENS = 32
+
+
+def _shingles(text: str, size: int = 5) -> set:
+    words = re.findall(r"\w+", text.lower())
+    if len(words) <= size:
+        return {tuple(words)}
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class ContextPacker:
+    """
+    Builds the context for one question from the retrieved chunks within a
+    token budget: highest-scoring chunks first, chunks that touch or overlap in
+    the article merged into one passage, near-duplicate passages dropped, and
+    the last passage trimmed to whatever budget is left. Passages are emitted
+    in article order.
+    """
+
+    def __init__(self, tokenizer_name: str = "bert-base-uncased", max_tokens: int = 1200,
+                 duplicate_threshold: float = 0.8, max_gap: int = 1):
+        from transformers import AutoTokenizer
+
+        self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+        self.max_tokens = max_tokens
+        self.duplicate_threshold = duplicate_threshold
+        self.max_gap = max_gap
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.tokenizer(text, add_special_tokens=False)["input_ids"])
+
+    def _trim(self, text: str, max_tokens: int) -> str:
+        """Cut `text` after its first `max_tokens` tokens, at the original character offset."""
+        offsets = self.tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+        if len(offsets) <= max_tokens:
+            return text
+        return text[:offsets[max_tokens - 1][1]]
+
+    def _merge(self, spans: list[tuple[int, int]]) -> list[tuple[int, int]]:
+        """Union of spans, joining those that overlap or are separated by at most `max_gap` characters."""
+        merged = []
+        for start, end in sorted(spans):
+            if merged and start <= merged[-1][1] + self.max_gap:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
+
+    def pack(self, text: str, spans: list[tuple[int, int]], hits: list[tuple[float, int]],
+             token_counts: Optional[dict] = None, max_tokens: Optional[int] = None) -> tuple[str, int]:
+        """
+        Pack the chunks `hits` ((score, chunk index) pairs, best first) of
+        `text` into one context string. `token_counts` memoises passage token
+        counts and can be shared between the questions of one article, which
+        retrieve many of the same chunks. `max_tokens` overrides the packer's
+        budget. Returns the context and its token count.
+        """
+        token_counts = {} if token_counts is None else token_counts
+        max_tokens = self.max_tokens if max_tokens is None else max_tokens
+
+        def _tokens(span: tuple[int, int]) -> int:
+            if span not in token_counts:
+                token_counts[span] = self.count_tokens(text[span[0]:span[1]])
+            return token_counts[span]
+
+        selected: list[tuple[int, int]] = []
+        selected_shingles: list[set] = []
+        for _, idx in hits:
+            span = spans[idx]
+            candidate = self._merge(selected + [span])
+            if len(candidate) == len(selected) + 1:
+                # A separate passage: skip it if it mostly repeats one already kept
+                shingles = _shingles(text[span[0]:span[1]])
+                if any(len(shingles & kept) / max(len(shingles), 1) >= self.duplicate_threshold
+                       for kept in selected_shingles):
+                    continue
+                selected_shingles.append(shingles)
+
+            if max_tokens and sum(_tokens(s) for s in candidate) > max_tokens:
+                remaining = max_tokens - sum(_tokens(s) for s in selected)
+                if remaining >= MIN_TRIMMED_TOKENS and len(candidate) == len(selected) + 1:
+                    trimmed = self._trim(text[span[0]:span[1]], remaining)
+                    span = (span[0], span[0] + len(trimmed))
+                    token_counts.setdefault(span, self.count_tokens(trimmed))
+                    selected = self._merge(selected + [span])
+                break
+            selected = candidate
+
+        passages = [text[start:end].strip() for start, end in selected]
+        return "\n".join(passages), sum(_tokens(s) for s in selected)
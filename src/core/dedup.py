@@ -0,0 +1,122 @@
+import hashlib
+import re
+import zlib
+
+import numpy as np
+
+# Segments (lines or sentences) that are page furniture rather than article text
+BOILERPLATE_PATTERNS = [
+    r"\b(?:we|this (?:site|website)) uses? cookies\b",
+    r"\baccept (?:all )?cookies\b",
+    r"^\s*(?:manage |change |update )?(?:your )?cookie (?:policy|settings|preferences)\s*[.!]?\s*$",
+    r"^\s*(?:share|tweet|pin)(?: (?:this|on|via)\b.{0,60})?$",
+    r"\bshare (?:on|via) (?:facebook|twitter|x|linkedin|reddit|email)\b",
+    r"\bfollow us on\b",
+    r"\b(?:subscribe|sign up) (?:to|for) (?:our|the) (?:newsletter|blog|updates)\b",
+    r"\ball rights reserved\b|^\s*(?:©|\(c\)|copyright)\s*\d{4}",
+    r"^\s*(?:skip to (?:main )?content|back to top|read more|related (?:posts|articles)|previous post|next post)\s*$",
+    r"^\s*(?:home|about|contact|blog|products|solutions|resources|careers|login|sign in)(?:\s*[|/>»]\s*\w+)+\s*$",
+    r"\bprivacy policy\b.{0,80}\bterms\b|\bterms of (?:use|service)\b",
+]
+_BOILERPLATE = re.compile("|".join(f"(?:{p})" for p in BOILERPLATE_PATTERNS), re.IGNORECASE)
+# Lines, and sentences within a line: text extracted without newlines is one long line
+_SEGMENT_SPLIT = re.compile(r"\n+|(?<=[.!?])\s+|(?<=[a-z0-9)][.!?])(?=[A-Z])")
+# A matching segment up to this long counts as boilerplate as a whole; in a
+# longer one only the matched text does
+MAX_BOILERPLATE_SEGMENT_CHARS = 160
+
+_MERSENNE_PRIME = (1 << 61) - 1
+# Coefficients below 2**32 keep a * crc32 + b under 2**64, so the uint64
+# arithmetic does not wrap before the modulo
+_MAX_COEFFICIENT = 1 << 32
+
+
+class ChunkDeduplicator:
+    """
+    Drops chunks before they are embedded: chunks that are mostly boilerplate
+    lines (cookie banners, share widgets, navigation, footers), exact
+    duplicates, and near-duplicates found with MinHash over word shingles and
+    LSH banding. The first occurrence of a duplicated passage is kept.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 64, bands: int = 16,
+                 shingle_size: int = 5, boilerplate_ratio: float = 0.6):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+        self.boilerplate_ratio = boilerplate_ratio
+        rng = np.random.default_rng(0)
+        self._a = rng.integers(1, _MAX_COEFFICIENT, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _MAX_COEFFICIENT, size=num_perm, dtype=np.uint64)
+
+    def settings(self) -> dict:
+        """Everything that changes the output; part of the embedding-cache key."""
+        return {"threshold": self.threshold, "num_perm": self.num_perm, "bands": self.bands,
+                "shingle_size": self.shingle_size, "boilerplate_ratio": self.boilerplate_ratio,
+                "max_segment_chars": MAX_BOILERPLATE_SEGMENT_CHARS, "max_coefficient": _MAX_COEFFICIENT,
+                "patterns": hashlib.sha256("\n".join(BOILERPLATE_PATTERNS).encode("utf-8")).hexdigest()[:16]}
+
+    def _is_boilerplate(self, chunk: str) -> bool:
+        """True when boilerplate text makes up at least `boilerplate_ratio` of the chunk."""
+        segments = [segment.strip() for segment in _SEGMENT_SPLIT.split(chunk) if segment.strip()]
+        total = sum(len(segment) for segment in segments)
+        if not total:
+            return True
+        boilerplate = 0
+        for segment in segments:
+            matched = sum(len(match.group()) for match in _BOILERPLATE.finditer(segment))
+            if matched:
+                boilerplate += len(segment) if len(segment) <= MAX_BOILERPLATE_SEGMENT_CHARS else matched
+        return boilerplate / total >= self.boilerplate_ratio
+
+    def _signature(self, words: list[str]) -> np.ndarray:
+        n = self.shingle_size
+        shingles = {" ".join(words[i:i + n]) for i in range(max(len(words) - n + 1, 1))}
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64)
+        # Universal hashing (a*x + b) mod p, one row per permutation, minimum over shingles
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % _MERSENNE_PRIME
+        return permuted.min(axis=1)
+
+    def filter(self, chunks: list[str]) -> tuple[list[int], dict]:
+        """
+        Return the indices of the chunks to keep, in order, and the number
+        removed per reason ("boilerplate", "exact", "near").
+        """
+        removed = {"boilerplate": 0, "exact": 0, "near": 0}
+        keep = []
+        seen_exact = set()
+        signatures = []
+        buckets: dict[tuple, list[int]] = {}
+        rows = self.num_perm // self.bands
+
+        for i, chunk in enumerate(chunks):
+            if self._is_boilerplate(chunk):
+                removed["boilerplate"] += 1
+                continue
+
+            words = re.findall(r"\w+", chunk.lower())
+            digest = hashlib.sha1(" ".join(words).encode("utf-8")).digest()
+            if digest in seen_exact:
+                removed["exact"] += 1
+                continue
+            seen_exact.add(digest)
+
+            signature = self._signature(words)
+            band_keys = [(b, signature[b * rows:(b + 1) * rows].tobytes()) for b in range(self.bands)]
+            candidates = {j for key in band_keys for j in buckets.get(key, ())}
+            if any(np.mean(signature == signatures[j]) >= self.threshold for j in candidates):
+                removed["near"] += 1
+                continue
+
+            for key in band_keys:
+                buckets.setdefault(key, []).append(len(signatures))
+            signatures.append(signature)
+            keep.append(i)
+
+        if not keep and chunks:
+            # Never leave an article without anything to index
+            return list(range(len(chunks))), {"boilerplate": 0, "exact": 0, "near": 0}
+        return keep, removed
@@ -0,0 +1,79 @@
+import logging
+import os
+import platform
+from typing import Optional
+
+from src.core.paths import get_cache_dir
+
+logger = logging.getLogger(__name__)
+
+EMBED_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+
+def _quantization_config() -> str:
+    """Dynamic int8 quantisation preset matching this CPU."""
+    if platform.machine().lower() in ("arm64", "aarch64"):
+        return "arm64"
+    return os.getenv("EMBED_ONNX_QUANTIZATION", "avx2")
+
+
+def _onnx_session_options(num_threads: Optional[int]):
+    import onnxruntime
+
+    options = onnxruntime.SessionOptions()
+    if num_threads:
+        options.intra_op_num_threads = num_threads
+    return options
+
+
+def _export_quantized(model_name: str, config: str) -> str:
+    """
+    Export `model_name` to ONNX and quantise it to int8 once, under the cache
+    directory. Returns the local model directory.
+    """
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+    model_dir = os.path.join(get_cache_dir("onnx"), model_name.replace("/", "__"))
+    if os.path.exists(os.path.join(model_dir, "onnx", f"model_qint8_{config}.onnx")):
+        return model_dir
+
+    logger.info(f"Exporting {model_name} to int8 ONNX ({config}) in {model_dir}")
+    model = SentenceTransformer(model_name, backend="onnx")
+    model.save(model_dir)
+    export_dynamic_quantized_onnx_model(model, config, model_dir)
+    return model_dir
+
+
+def load_embedder(model_name: str, backend: str = "torch", num_threads: Optional[int] = None):
+    """
+    Load a SentenceTransformer for the given backend:
+      - "torch": the regular PyTorch model
+      - "onnx": the model exported to ONNX Runtime
+      - "onnx-int8": the ONNX model with int8 dynamic quantisation
+    `num_threads` sets the intra-op threads of the ONNX Runtime session
+    (EMBED_THREADS when not given).
+    """
+    from sentence_transformers import SentenceTransformer
+
+    if backend not in EMBED_BACKENDS:
+        raise ValueError(f"Unknown embedding backend: {backend}. Choose from {EMBED_BACKENDS}.")
+    if backend == "torch":
+        return SentenceTransformer(model_name)
+
+    num_threads = num_threads or int(os.getenv("EMBED_THREADS", "0")) or None
+    model_kwargs = {
+        "provider": "CPUExecutionProvider",
+        "session_options": _onnx_session_options(num_threads),
+    }
+    if backend == "onnx":
+        return SentenceTransformer(model_name, backend="onnx", model_kwargs=model_kwargs)
+
+    config = _quantization_config()
+    model_dir = _export_quantized(model_name, config)
+    model_kwargs["file_name"] = f"onnx/model_qint8_{config}.onnx"
+    return SentenceTransformer(model_dir, backend="onnx", model_kwargs=model_kwargs)
+
+
+def embedder_id(model_name: str, backend: str) -> str:
+    """Identifier used in cache keys, so vectors from different backends never mix."""
+    return model_name if backend == "torch" else f"{model_name}@{backend}"
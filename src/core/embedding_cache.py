@@ -0,0 +1,116 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Optional
+
+import numpy as np
+
+from src.core.paths import get_cache_dir
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """
+    Content-addressed on-disk cache of article chunk boundaries and their
+    embedding matrix. Entries are keyed by a hash of the article text, the
+    chunker settings and the embedding model, and the least recently used
+    entries are evicted once the cache grows beyond `max_bytes`.
+    """
+
+    def __init__(self,
+                 cache_dir: Optional[str] = None,
+                 max_bytes: int = 512 * 1024 * 1024,
+                 dtype: str = "float32"):
+        if dtype not in ("float32", "float16"):
+            raise ValueError(f"Unsupported embedding cache dtype: {dtype}")
+        self.cache_dir = cache_dir or get_cache_dir("embeddings")
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.dtype = dtype
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(text: str, model_name: str, settings: dict) -> str:
+        h = hashlib.sha256()
+        h.update(model_name.encode("utf-8"))
+        h.update(json.dumps(settings, sort_keys=True).encode("utf-8"))
+        h.update(text.encode("utf-8"))
+        return h.hexdigest()
+
+    def _paths(self, key: str) -> tuple[str, str]:
+        base = os.path.join(self.cache_dir, key)
+        return base + ".json", base + ".npy"
+
+    def get(self, key: str) -> Optional[tuple[list[tuple[int, int]], np.ndarray]]:
+        """
+        Return the cached chunk spans and a read-only memory-mapped embedding
+        matrix, or None on a miss.
+        """
+        meta_path, emb_path = self._paths(key)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                spans = [tuple(span) for span in json.load(f)["spans"]]
+            embeddings = np.load(emb_path, mmap_mode="r")
+        except (OSError, ValueError, KeyError):
+            return None
+
+        if embeddings.shape[0] != len(spans):
+            logger.warning(f"Discarding inconsistent embedding cache entry {key}")
+            self._remove(key)
+            return None
+
+        # Refresh the timestamps so eviction treats the entry as recently used
+        for path in (meta_path, emb_path):
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+        return spans, embeddings
+
+    def put(self, key: str, spans: list[tuple[int, int]], embeddings: np.ndarray):
+        meta_path, emb_path = self._paths(key)
+        tmp_suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(emb_path + tmp_suffix, "wb") as f:
+                np.save(f, np.asarray(embeddings, dtype=self.dtype))
+            with open(meta_path + tmp_suffix, "w", encoding="utf-8") as f:
+                json.dump({"spans": [list(span) for span in spans]}, f)
+            # Embeddings first: a metadata file always has its matrix next to it
+            os.replace(emb_path + tmp_suffix, emb_path)
+            os.replace(meta_path + tmp_suffix, meta_path)
+        except OSError as e:
+            logger.warning(f"Could not write embedding cache entry {key}: {e}")
+            return
+
+        self._evict()
+
+    def _remove(self, key: str):
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _evict(self):
+        with self._lock:
+            entries = {}
+            for name in os.listdir(self.cache_dir):
+                key, ext = os.path.splitext(name)
+                if ext not in (".json", ".npy"):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(self.cache_dir, name))
+                except OSError:
+                    continue
+                size, mtime = entries.get(key, (0, 0.0))
+                entries[key] = (size + stat.st_size, max(mtime, stat.st_mtime))
+
+            total = sum(size for size, _ in entries.values())
+            for key, (size, _) in sorted(entries.items(), key=lambda item: item[1][1]):
+                if total <= self.max_bytes:
+                    break
+                self._remove(key)
+                total -= size
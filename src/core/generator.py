@@ -1,46 +1,180 @@
+import json
 import os
-import ollama
+import re
+from typing import Iterator, Optional
 from dotenv import load_dotenv
-from src.llm_api import get_chat_llm_client  # Your WatsonX API wrapper
+from src.llm_api.router import LLMRouter
+from src.core.answer_cache import AnswerCache
+from src.core.telemetry import get_telemetry
 
 load_dotenv()
 
+SYSTEM_PROMPT = "You are a cybersecurity assistant."
+
+# Grouped answers are longer than the client's default 100-token limit
+GROUPED_MAX_TOKENS = 1024
+
+
+def parse_grouped_answers(text: str, n: int) -> list[Optional[str]]:
+    """
+    Read the answers to `n` numbered questions from a grouped response. Accepts
+    a JSON object keyed by question number (optionally in a code fence, with
+    trailing commas or {"answer": ...} values), a JSON list, or "1. answer"
+    lines. Missing answers are None.
+    """
+    answers: list[Optional[str]] = [None] * n
+    cleaned = re.sub(r"^```(?:json)?\s*|```\s*$", "", text.strip(), flags=re.MULTILINE).strip()
+
+    data = None
+    start = min((i for i in (cleaned.find("{"), cleaned.find("[")) if i != -1), default=-1)
+    end = max(cleaned.rfind("}"), cleaned.rfind("]"))
+    if start != -1 and end > start:
+        candidate = cleaned[start:end + 1]
+        for attempt in (candidate, re.sub(r",\s*([}\]])", r"\1", candidate)):
+            try:
+                data = json.loads(attempt)
+                break
+            except ValueError:
+                continue
+
+    if isinstance(data, list):
+        data = {str(i): value for i, value in enumerate(data, 1)}
+    if isinstance(data, dict):
+        for key, value in data.items():
+            number = re.search(r"\d+", str(key))
+            if isinstance(value, dict):
+                value = value.get("answer")
+            if number and isinstance(value, str) and value.strip() and 0 < int(number.group()) <= n:
+                answers[int(number.group()) - 1] = value.strip()
+        return answers
+
+    for match in re.finditer(r'^\s*"?(\d+)"?\s*[.:)]\s*"?(.+?)"?,?\s*$', cleaned, re.MULTILINE):
+        i = int(match.group(1)) - 1
+        if 0 <= i < n and answers[i] is None:
+            answers[i] = match.group(2).strip()
+    return answers
+
+
 class LLMGenerator:
-    def __init__(self, prompt_name="extract_qa"):
+    def __init__(self, prompt_name="extract_qa", cache: Optional[AnswerCache] = None,
+                 grouped_prompt_name="extract_qa_grouped"):
         """
-        Initialize the generator with the selected LLM provider and model from .env
+        Initialize the generator with the selected LLM provider and model from .env.
+        When a cache is given, answers are looked up there before calling the LLM.
+        Every call goes through an LLMRouter: the endpoints in LLM_ENDPOINTS, or
+        the single LLM_PROVIDER/LLM_MODEL endpoint, each with a timeout, retries
+        and a circuit breaker.
         """
-        self.provider = os.getenv("LLM_PROVIDER", "ollama").lower()
-        self.model = os.getenv("LLM_MODEL", "mistral")
+        self.router = LLMRouter.from_env()
+        if len(self.router.endpoints) == 1:
+            self.provider = self.router.endpoints[0].provider
+            self.model = self.router.endpoints[0].model
+        else:
+            self.provider = "router"
+            self.model = self.router.name
         self.prompt = self.get_prompt(prompt_name)
-
-        if self.provider == "watsonx":
-            self.client = get_chat_llm_client(model_name=self.model)
+        self.grouped_prompt = self.get_prompt(grouped_prompt_name)
+        self.cache = cache
+        self.telemetry = get_telemetry()
 
     def build_prompt(self, question: str, context: str) -> str:
         return self.prompt.format(context=context.strip(), question=question.strip())
 
+    def _cache_key(self, question: str, context: str) -> Optional[str]:
+        if self.cache is None:
+            return None
+        return AnswerCache.make_key(self.provider, self.model, self.prompt, question, context)
+
+    def _cached_answer(self, key: Optional[str]) -> Optional[str]:
+        answer = self.cache.get(key) if key is not None else None
+        if answer is not None:
+            self.telemetry.incr("answer_cache_hits")
+        return answer
+
+    def _record_usage(self, prompt_tokens: Optional[int], completion_tokens: Optional[int]):
+        self.telemetry.incr("llm_calls")
+        if prompt_tokens:
+            self.telemetry.incr("prompt_tokens", prompt_tokens)
+        if completion_tokens:
+            self.telemetry.incr("completion_tokens", completion_tokens)
+
+    def _record_routed(self, result) -> str:
+        self._record_usage(result.prompt_tokens, result.completion_tokens)
+        return result.text.strip()
+
+    def _store_answer(self, key: Optional[str], answer: str):
+        if key is not None:
+            self.cache.put(key, answer)
+
     def generate_answer(self, question: str, context: str) -> str:
+        key = self._cache_key(question, context)
+        answer = self._cached_answer(key)
+        if answer is not None:
+            return answer
+
         prompt = self.build_prompt(question, context)
+        with self.telemetry.span("generate", provider=self.provider):
+            answer = self._record_routed(self.router.complete(prompt, system=SYSTEM_PROMPT))
+        self._store_answer(key, answer)
+        return answer
 
-        if self.provider == "watsonx":
-            return self._generate_with_watsonx(prompt)
-        else:
-            return self._generate_with_ollama(prompt)
-
-    def _generate_with_ollama(self, prompt: str) -> str:
-        response = ollama.chat(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": "You are a cybersecurity assistant."},
-                {"role": "user", "content": prompt}
-            ]
-        )
-        return response['message']['content'].strip()
-
-    def _generate_with_watsonx(self, prompt: str) -> str:
-        response = self.client.invoke(prompt)
-        return response.content.strip()
+    async def agenerate_answer(self, question: str, context: str) -> str:
+        key = self._cache_key(question, context)
+        answer = self._cached_answer(key)
+        if answer is not None:
+            return answer
+
+        prompt = self.build_prompt(question, context)
+        with self.telemetry.span("generate", provider=self.provider):
+            answer = self._record_routed(await self.router.acomplete(prompt, system=SYSTEM_PROMPT))
+        self._store_answer(key, answer)
+        return answer
+
+    async def agenerate_group(self, questions: list[str], context: str) -> list[Optional[str]]:
+        """
+        Answer several questions over one shared context in a single LLM call
+        that returns a JSON object. Returns one answer per question, None where
+        the output had no usable answer so the caller can ask that question alone.
+        """
+        numbered = "\n".join(f"{i}. {question.strip()}" for i, question in enumerate(questions, 1))
+        key = (AnswerCache.make_key(self.provider, self.model, self.grouped_prompt, numbered, context)
+               if self.cache is not None else None)
+        raw = self._cached_answer(key)
+        if raw is None:
+            prompt = self.grouped_prompt.format(context=context.strip(), questions=numbered)
+            with self.telemetry.span("generate", provider=self.provider, grouped=len(questions)):
+                raw = self._record_routed(await self.router.acomplete(
+                    prompt, system=SYSTEM_PROMPT, format="json", max_tokens=GROUPED_MAX_TOKENS))
+
+        answers = parse_grouped_answers(raw, len(questions))
+        # Only well-formed responses are worth replaying from the cache
+        if all(answer is not None for answer in answers):
+            self._store_answer(key, raw)
+        return answers
+
+    def stream_answer(self, question: str, context: str) -> Iterator[str]:
+        """
+        Yield the answer token by token as the LLM produces it. A cached answer
+        is yielded in one piece.
+        """
+        key = self._cache_key(question, context)
+        answer = self._cached_answer(key)
+        if answer is not None:
+            yield answer
+            return
+
+        prompt = self.build_prompt(question, context)
+        parts = []
+        prompt_tokens = completion_tokens = None
+        with self.telemetry.span("generate", provider=self.provider, stream=True):
+            for piece in self.router.stream(prompt, system=SYSTEM_PROMPT):
+                # Token counts arrive with the last piece (Ollama) or on any piece (WatsonX)
+                prompt_tokens = piece.prompt_tokens or prompt_tokens
+                completion_tokens = piece.completion_tokens or completion_tokens
+                parts.append(piece.text)
+                yield piece.text
+        self._record_usage(prompt_tokens, completion_tokens)
+        self._store_answer(key, "".join(parts).strip())
 
     def get_prompt(self, name: str) -> str:
         current_dir = os.path.dirname(os.path.abspath(__file__))
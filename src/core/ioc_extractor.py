@@ -0,0 +1,86 @@
+import re
+from typing import Iterable
+from urllib.parse import urlparse
+
+# Defanged notations used in threat-intel write-ups: hxxp://, evil[.]com, 1.2.3[.]4, user[@]mail.com
+_REFANG = [
+    (re.compile(r"\bhxxp(s?)", re.IGNORECASE), r"http\1"),
+    (re.compile(r"\[\s*\.\s*\]|\(\s*\.\s*\)|\{\s*\.\s*\}|\[dot\]|\(dot\)", re.IGNORECASE), "."),
+    (re.compile(r"\[\s*@\s*\]|\(\s*@\s*\)|\[at\]|\(at\)", re.IGNORECASE), "@"),
+    (re.compile(r"\[\s*:\s*\]//|\[://\]"), "://"),
+]
+
+# Domains are only reported with a real TLD, so file names (dropper.exe) and
+# abbreviations (e.g.) are not mistaken for hosts
+_TLDS = frozenset("""
+    com net org info biz io co me cc tv ru su cn top xyz online site club live shop store app dev
+    cloud tech pro link click pw tk ml ga cf gq ws to in us uk de fr nl it es pl br jp kr ir ua by
+    kz vn id th tr eu ca au ch se no fi dk cz ro hu gr pt be at il sg hk tw my ph pk ng za mx ar cl
+    onion bit space website icu monster buzz rest fun work host
+""".split())
+
+BENIGN_DOMAINS = frozenset({
+    "microsoft.com", "google.com", "github.com", "twitter.com", "x.com", "linkedin.com",
+    "facebook.com", "youtube.com", "mitre.org", "attack.mitre.org", "virustotal.com",
+})
+
+_PATTERNS = [
+    ("url", r"\b(?:https?|ftp)://[^\s<>\"'`]+"),
+    ("email", r"\b[a-z0-9._%+-]+@(?:[a-z0-9-]+\.)+[a-z]{2,24}\b"),
+    ("cve", r"\bCVE-\d{4}-\d{4,7}\b"),
+    ("mitre", r"\b(?:T\d{4}(?:\.\d{3})?|TA\d{4})\b"),
+    ("sha256", r"\b[a-f0-9]{64}\b"),
+    ("sha1", r"\b[a-f0-9]{40}\b"),
+    ("md5", r"\b[a-f0-9]{32}\b"),
+    ("ipv4", r"\b(?:(?:25[0-5]|2[0-4]\d|1?\d?\d)\.){3}(?:25[0-5]|2[0-4]\d|1?\d?\d)\b"),
+    ("domain", r"\b(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z]{2,24}\b"),
+]
+
+# One alternation, so the article is scanned in a single pass; earlier
+# alternatives win, so a URL's host is not reported again as a domain.
+IOC_PATTERN = re.compile("|".join(f"(?P<{name}>{pattern})" for name, pattern in _PATTERNS), re.IGNORECASE)
+
+IOC_TYPES = tuple(name for name, _ in _PATTERNS)
+
+IOC_LABELS = {
+    "url": "URLs", "email": "Email addresses", "cve": "CVEs", "mitre": "MITRE ATT&CK techniques",
+    "sha256": "SHA256 hashes", "sha1": "SHA1 hashes", "md5": "MD5 hashes",
+    "ipv4": "IP addresses", "domain": "Domains",
+}
+
+
+def refang(text: str) -> str:
+    for pattern, replacement in _REFANG:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def _normalize(kind: str, value: str) -> str:
+    if kind == "url":
+        return value.rstrip(".,;:!?)]}")
+    if kind in ("cve", "mitre"):
+        return value.upper()
+    return value.lower()
+
+
+def extract_iocs(text: str) -> dict[str, list[str]]:
+    """
+    Extract indicators from an article (refanging it first). Returns every
+    IOC type mapped to its unique values in order of first appearance.
+    """
+    found = {kind: {} for kind in IOC_TYPES}
+    for match in IOC_PATTERN.finditer(refang(text)):
+        kind = match.lastgroup
+        value = _normalize(kind, match.group(kind))
+        if kind == "domain" and (value.rsplit(".", 1)[-1] not in _TLDS or value in BENIGN_DOMAINS):
+            continue
+        if kind == "url" and (urlparse(value).hostname or "") in BENIGN_DOMAINS:
+            continue
+        found[kind].setdefault(value, None)
+    return {kind: list(values) for kind, values in found.items()}
+
+
+def format_iocs(iocs: dict[str, list[str]], kinds: Iterable[str]) -> str:
+    """Render the IOCs of the given types as an answer, or "" if there are none."""
+    lines = [f"{IOC_LABELS[kind]}: {', '.join(iocs[kind])}" for kind in kinds if iocs.get(kind)]
+    return "\n".join(lines)
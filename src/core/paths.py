@@ -0,0 +1,14 @@
+import os
+
+
+def get_cache_dir(name: str) -> str:
+    """
+    Return (and create) a named sub-directory of the cyber-rag cache root,
+    which defaults to ~/.cache/cyber-rag and can be moved with CYBER_RAG_CACHE_DIR.
+    """
+    root = os.getenv(
+        "CYBER_RAG_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "cyber-rag")
+    )
+    path = os.path.join(root, name)
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -1,43 +1,317 @@
+import asyncio
+import os
+import threading
+from collections import defaultdict
+from typing import Iterator, Optional
+
+from src.core.answer_cache import AnswerCache
+from src.core.context_packer import ContextPacker
+from src.core.dedup import ChunkDeduplicator
+from src.core.embedding_cache import EmbeddingCache
 from src.core.retriever import RAGRetriever
 from src.core.generator import LLMGenerator
-from src.questions.predefined_questions import load_predefined_questions
+from src.core.ioc_extractor import extract_iocs, format_iocs
+from src.questions.predefined_questions import load_predefined_questions, load_query_embeddings
+
+NOT_FOUND_ANSWER = "The answer cannot be determined from the provided context."
 
 
 class RAGPipeline:
     def __init__(self,
                  embed_model: str = 'multi-qa-MiniLM-L6-cos-v1',
+                 embed_backend: Optional[str] = None,
                  tokenizer_name: str = 'bert-base-uncased',
                  llm_model: str = 'phi3',
                  prompt_name: str = 'extract_qa',
-                 top_k = 4):
+                 top_k = 4,
+                 chunk_size: int = 512,
+                 use_embedding_cache: bool = True,
+                 use_answer_cache: bool = True,
+                 max_concurrency: Optional[int] = None,
+                 max_context_tokens: Optional[int] = None,
+                 ioc_mode: Optional[str] = None,
+                 short_article_tokens: Optional[int] = None,
+                 min_retrieval_score: Optional[float] = None,
+                 dedup_chunks: bool = True,
+                 grouped_generation: Optional[bool] = None,
+                 max_group_size: int = 4,
+                 group_overlap: float = 0.5):
 
-        self.retriever = RAGRetriever(model_name=embed_model)
-        self.generator = LLMGenerator(prompt_name=prompt_name)
+        self.retriever = RAGRetriever(
+            model_name=embed_model,
+            chunk_size=chunk_size,
+            cache=EmbeddingCache() if use_embedding_cache else None,
+            backend=embed_backend,
+            deduplicator=ChunkDeduplicator() if dedup_chunks else None,
+        )
+        self.generator = LLMGenerator(
+            prompt_name=prompt_name,
+            cache=AnswerCache() if use_answer_cache else None,
+        )
         self.top_k = top_k
+        # 0 disables the budget but keeps merging and de-duplication
+        self.max_context_tokens = (max_context_tokens if max_context_tokens is not None
+                                   else int(os.getenv("CONTEXT_MAX_TOKENS", "1200")))
+        self.context_packer = ContextPacker(tokenizer_name, max_tokens=self.max_context_tokens)
+        # Adaptive retrieval: articles up to this many tokens skip indexing
+        # (defaults to the context budget), and questions whose best chunk
+        # scores below the floor are not sent to the LLM. 0 disables either.
+        self.short_article_tokens = (short_article_tokens if short_article_tokens is not None
+                                     else int(os.getenv("SHORT_ARTICLE_TOKENS", str(self.max_context_tokens))))
+        self.min_retrieval_score = (min_retrieval_score if min_retrieval_score is not None
+                                    else float(os.getenv("MIN_RETRIEVAL_SCORE", "0.15")))
+        self.max_concurrency = max_concurrency or int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+        # Grouped generation: questions whose retrieved chunks overlap by at
+        # least `group_overlap` (Jaccard) are answered together in one call
+        self.grouped_generation = (grouped_generation if grouped_generation is not None
+                                   else os.getenv("GROUPED_GENERATION", "").lower() in ("1", "true", "yes"))
+        self.max_group_size = max_group_size
+        self.group_overlap = group_overlap
+        # The retriever keeps a single index, so indexing and searching one
+        # article must not interleave with another when the pipeline is shared.
+        self._index_lock = threading.Lock()
 
         q_data = load_predefined_questions()
         self.questions = q_data["analyst_questions"]
         self.queries = q_data["analyst_queries"]
         if len(self.questions) != len(self.queries):
             raise ValueError("Mismatch between number of questions and queries.")
+        # IOC types found in the article are handed to the LLM alongside the
+        # context ("prefill"), or answer the question directly ("answer"), which
+        # is only right for questions that literally ask for a list of those
+        # indicators. analyst_ioc_modes sets this per question (default
+        # "prefill"); IOC_MODE=prefill caps every question at prefill and
+        # IOC_MODE=off disables both.
+        self.ioc_types = q_data.get("analyst_ioc_types") or [[] for _ in self.questions]
+        self.ioc_modes = [mode or "prefill" for mode in q_data.get("analyst_ioc_modes") or [None] * len(self.questions)]
+        if len(self.ioc_types) != len(self.questions) or len(self.ioc_modes) != len(self.questions):
+            raise ValueError("Mismatch between number of questions and analyst_ioc_types/analyst_ioc_modes.")
+        if any(mode not in ("answer", "prefill") for mode in self.ioc_modes):
+            raise ValueError(f"Unknown IOC mode in analyst_ioc_modes: {self.ioc_modes}")
+        self.ioc_mode = ioc_mode or os.getenv("IOC_MODE", "answer")
+        if self.ioc_mode not in ("answer", "prefill", "off"):
+            raise ValueError(f"Unknown IOC mode: {self.ioc_mode}")
 
+        # The queries are constant, so embed them once instead of per article
+        self.query_vectors = load_query_embeddings(
+            self.queries, self.retriever.embedder_id, self.retriever.encode_queries
+        )
 
-    def run_all(self, blog_text: str) -> list[dict]:
-        self.retriever.prepare_index(blog_text)
-        results = []
-
-        for i, (question, query) in enumerate(zip(self.questions, self.queries), 1):
-            retrieved_chunks = self.retriever.query(query, top_k=self.top_k)
-            context = "\n".join(
-                chunk.text if hasattr(chunk, "text") else chunk for chunk in retrieved_chunks
-            )
-            answer = self.generator.generate_answer(question, context)
-            results.append({
+    def retrieve_all(self, blog_text: str) -> list[dict]:
+        """
+        Retrieve the context for every predefined question, packed into the
+        context token budget. Short articles are used whole without indexing,
+        and questions whose best chunk scores below `min_retrieval_score` are
+        answered as not found without an LLM call. Each result records its
+        `retrieval_decision` ("full_article", "retrieved" or "below_score_floor").
+        """
+        telemetry = self.retriever.telemetry
+        article_tokens = None
+        # A token is rarely longer than ~8 characters, so long articles are not worth tokenizing here
+        if self.short_article_tokens and len(blog_text) <= self.short_article_tokens * 8:
+            article_tokens = self.context_packer.count_tokens(blog_text)
+        if article_tokens is not None and article_tokens <= self.short_article_tokens:
+            telemetry.incr("retrieval_bypassed")
+            context = blog_text.strip()
+            results = [{
                 "question_id": i,
                 "question": question,
                 "retrieval_query": query,
                 "retrieved_context": context,
-                "rag_answer": answer
-            })
+                "context_tokens": article_tokens,
+                "retrieval_decision": "full_article",
+            } for i, (question, query) in enumerate(zip(self.questions, self.queries), 1)]
+            telemetry.incr("context_tokens", article_tokens * len(results))
+            all_hits, spans = None, None
+        else:
+            results, all_hits, spans = self._retrieve_chunks(blog_text)
+
+        prefilled = set()
+        if self.ioc_mode != "off" and any(self.ioc_types):
+            prefilled = self._apply_iocs(blog_text, results)
+
+        if self.grouped_generation:
+            self._group_questions(blog_text, results, all_hits, spans, exclude=prefilled)
+
+        return results
+
+    def _retrieve_chunks(self, blog_text: str) -> tuple[list[dict], list, list[tuple[int, int]]]:
+        with self._index_lock:
+            self.retriever.prepare_index(blog_text)
+            all_hits = self.retriever.hits_batch(self.query_vectors, top_k=self.top_k)
+            spans = self.retriever.spans
+
+        telemetry = self.retriever.telemetry
+        results = []
+        # Questions retrieve many of the same chunks, so token counts are shared
+        token_counts = {}
+        with telemetry.span("pack", questions=len(all_hits)):
+            for i, (question, query, hits) in enumerate(
+                    zip(self.questions, self.queries, all_hits), 1):
+                top_score = hits[0][0] if hits else None
+                item = {
+                    "question_id": i,
+                    "question": question,
+                    "retrieval_query": query,
+                    "top_score": top_score,
+                }
+                if top_score is None or top_score < self.min_retrieval_score:
+                    # Nothing in the article is close enough to the question to be worth generating from
+                    telemetry.incr("retrieval_early_exits")
+                    item.update({
+                        "retrieved_context": "",
+                        "context_tokens": 0,
+                        "retrieval_decision": "below_score_floor",
+                        "rag_answer": NOT_FOUND_ANSWER,
+                        "answer_source": "retrieval",
+                    })
+                else:
+                    context, n_tokens = self.context_packer.pack(blog_text, spans, hits, token_counts)
+                    telemetry.incr("context_tokens", n_tokens)
+                    item.update({
+                        "retrieved_context": context,
+                        "context_tokens": n_tokens,
+                        "retrieval_decision": "retrieved",
+                    })
+                results.append(item)
+
+        return results, all_hits, spans
+
+    def _apply_iocs(self, blog_text: str, results: list[dict]) -> set:
+        """
+        Scan the article for IOCs once and use them for the questions mapped to
+        IOC types. Questions whose mode is "answer" (and IOC_MODE allows it)
+        skip the LLM entirely. Returns the positions of the questions whose
+        context was prefilled.
+        """
+        with self.retriever.telemetry.span("ioc"):
+            iocs = extract_iocs(blog_text)
+
+        prefilled = set()
+        for position, (item, kinds, mode) in enumerate(zip(results, self.ioc_types, self.ioc_modes)):
+            found = format_iocs(iocs, kinds)
+            if not found:
+                continue
+            if self.ioc_mode == "answer" and mode == "answer":
+                item["rag_answer"] = found
+                item["answer_source"] = "ioc"
+                self.retriever.telemetry.incr("ioc_answers")
+            else:
+                # The indicators show the article does cover the question, so let the LLM answer it
+                if item.get("answer_source") == "retrieval":
+                    del item["rag_answer"], item["answer_source"]
+                item["retrieved_context"] = f"Indicators extracted from the article:\n{found}\n\n{item['retrieved_context']}"
+                prefilled.add(position)
+        return prefilled
+
+    def _group_questions(self, blog_text: str, results: list[dict], all_hits: Optional[list],
+                         spans: Optional[list], exclude: set):
+        """
+        Cluster the questions still needing the LLM by overlap of their
+        retrieved chunks, and give every cluster of two or more one shared
+        context (the union of its chunks) so it is answered in a single call.
+        When the whole article is the context, all questions share it.
+        """
+        pending = [i for i, item in enumerate(results) if "rag_answer" not in item and i not in exclude]
+        clusters: list[tuple[list[int], set]] = []
+        for i in pending:
+            chunk_ids = {idx for _, idx in all_hits[i]} if all_hits is not None else set()
+            for members, ids in clusters:
+                union = chunk_ids | ids
+                overlap = len(chunk_ids & ids) / len(union) if union else 1.0
+                if len(members) < self.max_group_size and overlap >= self.group_overlap:
+                    members.append(i)
+                    ids |= chunk_ids
+                    break
+            else:
+                clusters.append(([i], set(chunk_ids)))
+
+        token_counts = {}
+        for group_id, (members, _) in enumerate(clusters):
+            if len(members) < 2:
+                continue
+            if all_hits is None:
+                context, n_tokens = results[members[0]]["retrieved_context"], results[members[0]]["context_tokens"]
+            else:
+                best = {}
+                for i in members:
+                    for score, idx in all_hits[i]:
+                        best[idx] = max(score, best.get(idx, score))
+                hits = sorted(((score, idx) for idx, score in best.items()), reverse=True)
+                context, n_tokens = self.context_packer.pack(
+                    blog_text, spans, hits, token_counts, max_tokens=self.max_context_tokens * len(members)
+                )
+            for i in members:
+                results[i].update({"group_id": group_id, "group_context": context, "group_context_tokens": n_tokens})
+
+    def generate_all(self, retrievals: list[dict]) -> list[dict]:
+        """
+        Answer every question from the output of `retrieve_all`.
+        """
+        return asyncio.run(self.agenerate_all(retrievals))
+
+    async def agenerate_all(self, retrievals: list[dict]) -> list[dict]:
+        """
+        Answer all questions concurrently, with at most `max_concurrency`
+        requests in flight. Results keep the question order.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def _answer(item: dict) -> str:
+            async with semaphore:
+                return await self.generator.agenerate_answer(
+                    item["question"], item["retrieved_context"]
+                )
+
+        async def _answer_single(item: dict):
+            item["rag_answer"] = await _answer(item)
+            item["answer_source"] = "llm"
+
+        async def _answer_group(items: list[dict]):
+            async with semaphore:
+                answers = await self.generator.agenerate_group(
+                    [item["question"] for item in items], items[0]["group_context"]
+                )
+            self.generator.telemetry.incr("grouped_calls")
+            fallbacks = []
+            for item, answer in zip(items, answers):
+                if answer is None:
+                    fallbacks.append(item)
+                else:
+                    item["rag_answer"] = answer
+                    item["answer_source"] = "llm_grouped"
+            # Malformed or incomplete output: ask the missing questions one by one
+            self.generator.telemetry.incr("grouped_fallbacks", len(fallbacks))
+            await asyncio.gather(*(_answer_single(item) for item in fallbacks))
+
+        # Questions already answered from the article's IOCs need no LLM call
+        pending = [item for item in retrievals if "rag_answer" not in item]
+        groups = defaultdict(list)
+        for item in pending:
+            if "group_id" in item:
+                groups[item["group_id"]].append(item)
+
+        await asyncio.gather(
+            *(_answer_single(item) for item in pending if "group_id" not in item),
+            *(_answer_group(items) for items in groups.values()),
+        )
+        for item in retrievals:
+            item.pop("group_context", None)
+        return retrievals
+
+    def run_all(self, blog_text: str) -> list[dict]:
+        return self.generate_all(self.retrieve_all(blog_text))
 
-        return results
\ No newline at end of file
+    def stream_all(self, blog_text: str) -> Iterator[tuple[dict, Iterator[str]]]:
+        """
+        Yield each question's retrieval result together with an iterator over
+        its answer tokens, one question at a time. The caller consumes the
+        tokens and fills in `rag_answer` itself.
+        """
+        for item in self.retrieve_all(blog_text):
+            # Streaming answers one question at a time, so groups are not used
+            item.pop("group_context", None)
+            if "rag_answer" in item:
+                yield item, iter([item["rag_answer"]])
+            else:
+                yield item, self.generator.stream_answer(item["question"], item["retrieved_context"])
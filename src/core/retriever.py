@@ -1,56 +1,179 @@
-from sentence_transformers import SentenceTransformer
+import logging
+import os
 import numpy as np
-import nltk
-import faiss
-from chonkie import RecursiveChunker
-for resource in ['punkt', 'punkt_tab']:
-    try:
-        nltk.data.find(f'tokenizers/{resource}')
-    except LookupError:
-        nltk.download(resource)
+from typing import Optional
 
+from src.core.dedup import ChunkDeduplicator
+from src.core.embedders import embedder_id, load_embedder
+from src.core.embedding_cache import EmbeddingCache
+from src.core.telemetry import get_telemetry
+
+logger = logging.getLogger(__name__)
+
+# sentence-transformers (torch), faiss, chonkie and nltk are imported where they
+# are first needed so that importing this module stays cheap.
+_nltk_checked = False
+
+
+def _ensure_nltk_resources():
+    global _nltk_checked
+    if _nltk_checked:
+        return
+    import nltk
+
+    for resource in ['punkt', 'punkt_tab']:
+        try:
+            nltk.data.find(f'tokenizers/{resource}')
+        except LookupError:
+            nltk.download(resource)
+    _nltk_checked = True
 
 
 class RAGRetriever:
-    def __init__(self, model_name = 'multi-qa-MiniLM-L6-cos-v1'):
-        self.chunker = RecursiveChunker(chunk_size=512)
-        self.embedder = SentenceTransformer(model_name)
+    def __init__(self, model_name = 'multi-qa-MiniLM-L6-cos-v1', chunk_size: int = 512,
+                 cache: Optional[EmbeddingCache] = None, backend: Optional[str] = None,
+                 batch_size: Optional[int] = None, num_threads: Optional[int] = None,
+                 deduplicator: Optional[ChunkDeduplicator] = None):
+        from chonkie import RecursiveChunker
+
+        _ensure_nltk_resources()
+        self.model_name = model_name
+        self.backend = backend or os.getenv("EMBED_BACKEND", "torch")
+        self.embedder_id = embedder_id(model_name, self.backend)
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size or int(os.getenv("EMBED_BATCH_SIZE", "32"))
+        self.chunker = RecursiveChunker(chunk_size=chunk_size)
+        self.embedder = load_embedder(model_name, self.backend, num_threads=num_threads)
+        self.cache = cache
+        self.deduplicator = deduplicator
+        self.telemetry = get_telemetry()
         self.chunks = []
+        self.spans = []
         self.index = None
 
-    def prepare_index(self, text: str):
-        self.chunks = self.chunker.chunk(text)  # use .chunk() method
-        if isinstance(self.chunks[0], str):
-            to_embed = self.chunks
+    def _cache_key(self, text: str) -> str:
+        settings = {"chunker": type(self.chunker).__name__, "chunk_size": self.chunk_size,
+                    "dedup": self.deduplicator.settings() if self.deduplicator is not None else None}
+        return EmbeddingCache.make_key(text, self.embedder_id, settings)
+
+    @staticmethod
+    def _chunk_spans(text: str, chunks: list) -> list[tuple[int, int]]:
+        spans = []
+        cursor = 0
+        for chunk in chunks:
+            start = getattr(chunk, "start_index", None)
+            end = getattr(chunk, "end_index", None)
+            if start is None or end is None:
+                chunk_text = chunk.text if hasattr(chunk, "text") else chunk
+                start = max(text.find(chunk_text, cursor), 0)
+                end = start + len(chunk_text)
+            spans.append((start, end))
+            cursor = end
+        return spans
+
+    def _chunk_and_embed(self, text: str) -> tuple[list[str], list[tuple[int, int]], np.ndarray]:
+        with self.telemetry.span("chunk"):
+            chunks = self.chunker.chunk(text)  # use .chunk() method
+        if isinstance(chunks[0], str):
+            to_embed = chunks
         else:
-            to_embed = [chunk.text for chunk in self.chunks]
+            to_embed = [chunk.text for chunk in chunks]
+        spans = self._chunk_spans(text, chunks)
+
+        if self.deduplicator is not None:
+            with self.telemetry.span("dedup", chunks=len(to_embed)):
+                keep, removed = self.deduplicator.filter(to_embed)
+            to_embed = [to_embed[i] for i in keep]
+            spans = [spans[i] for i in keep]
+            for reason, count in removed.items():
+                self.telemetry.incr(f"chunks_removed_{reason}", count)
+            if sum(removed.values()):
+                logger.info(f"Dropped {sum(removed.values())} of {len(chunks)} chunks before embedding: {removed}")
+
+        with self.telemetry.span("embed", chunks=len(to_embed)):
+            embeddings = self.embedder.encode(to_embed, batch_size=self.batch_size, convert_to_numpy=True)
+        return to_embed, spans, embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
 
-        embeddings = self.embedder.encode(to_embed, convert_to_numpy=True)
-        embeddings = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    def embed_document(self, text: str) -> tuple[list[str], list[tuple[int, int]], np.ndarray]:
+        """
+        Chunk and embed a document, going through the embedding cache when one
+        is configured. Returns the chunk texts, their (start, end) character
+        spans and the L2-normalised embedding matrix.
+        """
+        key = self._cache_key(text) if self.cache is not None else None
+        cached = self.cache.get(key) if key is not None else None
 
+        if cached is not None:
+            # Cache hit: rebuild the chunks from their boundaries, no chunking or embedding
+            spans, embeddings = cached
+            self.telemetry.incr("embedding_cache_hits")
+            return [text[start:end] for start, end in spans], spans, embeddings
+
+        chunks, spans, embeddings = self._chunk_and_embed(text)
+        if key is not None:
+            self.cache.put(key, spans, embeddings)
+        return chunks, spans, embeddings
+
+    def prepare_index(self, text: str):
+        import faiss
+
+        self.chunks, self.spans, embeddings = self.embed_document(text)
+
+        self.telemetry.incr("chunks_indexed", len(self.chunks))
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
         dim = embeddings.shape[1]
         self.index = faiss.IndexFlatIP(dim)
         self.index.add(embeddings)
 
-    def query(self, question: str, threshold: float = 0.2, top_k: int = 4):
-        if self.index is None:
-            return ["Index not initialized."]
+    def encode_queries(self, queries: list[str]) -> np.ndarray:
+        """
+        Embed and L2-normalise a list of queries in a single encode call.
+        """
+        q_vecs = self.embedder.encode(queries, batch_size=self.batch_size, convert_to_numpy=True)
+        return q_vecs / np.linalg.norm(q_vecs, axis=1, keepdims=True)
+
+    def search_batch(self, q_vecs: np.ndarray, top_k: int = 4):
+        """
+        Run one multi-row FAISS search. Returns the raw (scores, indices) arrays;
+        indices are -1 where the index holds fewer than top_k chunks.
+        """
+        with self.telemetry.span("search", queries=len(q_vecs)):
+            return self.index.search(np.ascontiguousarray(q_vecs, dtype=np.float32), top_k)
 
-        # Embed the query
-        q_vec = self.embedder.encode([question], convert_to_numpy=True)
-        q_vec = q_vec / np.linalg.norm(q_vec, axis=1, keepdims=True)
+    def hits_batch(self, q_vecs: np.ndarray, threshold: float = 0.2, top_k: int = 4) -> list[list[tuple[float, int]]]:
+        """
+        Retrieve (score, chunk index) pairs, best first, for several
+        pre-computed query vectors at once.
+        """
+        scores, indices = self.search_batch(q_vecs, top_k)
+        return [self._filter_hits(row_scores, row_indices, threshold, top_k)
+                for row_scores, row_indices in zip(scores, indices)]
 
-        # Search top max_k results
-        scores, indices = self.index.search(q_vec, top_k)
+    def query_batch(self, q_vecs: np.ndarray, threshold: float = 0.2, top_k: int = 4) -> list[list]:
+        """
+        Retrieve the chunks for several pre-computed query vectors at once.
+        """
+        if self.index is None:
+            return [["Index not initialized."] for _ in range(len(q_vecs))]
 
+        return [[self.chunks[idx] for _, idx in hits]
+                for hits in self.hits_batch(q_vecs, threshold=threshold, top_k=top_k)]
+
+    def _filter_hits(self, scores, indices, threshold: float, top_k: int) -> list[tuple[float, int]]:
         # Filter by threshold
-        filtered_chunks = []
-        for score, idx in zip(scores[0], indices[0]):
-            if score >= threshold:
-                filtered_chunks.append(self.chunks[idx])
+        filtered_hits = []
+        for score, idx in zip(scores, indices):
+            if idx >= 0 and score >= threshold:
+                filtered_hits.append((float(score), int(idx)))
 
         # Fallback: return at least one chunk if none pass threshold
-        if not filtered_chunks and top_k > 0:
-            filtered_chunks.append(self.chunks[indices[0][0]])
+        if not filtered_hits and top_k > 0 and indices[0] >= 0:
+            filtered_hits.append((float(scores[0]), int(indices[0])))
+
+        return filtered_hits
+
+    def query(self, question: str, threshold: float = 0.2, top_k: int = 4):
+        if self.index is None:
+            return ["Index not initialized."]
 
-        return filtered_chunks
\ No newline at end of file
+        return self.query_batch(self.encode_queries([question]), threshold=threshold, top_k=top_k)[0]
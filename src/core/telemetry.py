@@ -0,0 +1,149 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Optional
+
+
+class Telemetry:
+    """
+    In-process tracing and metrics for the pipeline: timed spans per stage
+    (fetch, parse, ocr, chunk, embed, search, generate), counters (chunks,
+    tokens, cache hits) and peak RSS. Exportable as a Chrome-trace JSON file
+    and as Prometheus text.
+    """
+
+    def __init__(self, max_spans: int = 100_000, max_samples: int = 10_000):
+        self.max_spans = max_spans
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._origin = time.perf_counter()
+            self._spans: list[dict] = []
+            # Percentiles use a bounded window; counts and sums are cumulative
+            self._durations = defaultdict(lambda: deque(maxlen=self.max_samples))
+            self._totals = defaultdict(lambda: [0, 0.0])
+            self._counters = defaultdict(float)
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                self._durations[name].append(end - start)
+                self._totals[name][0] += 1
+                self._totals[name][1] += end - start
+                if len(self._spans) < self.max_spans:
+                    self._spans.append({
+                        "name": name,
+                        "start": start - self._origin,
+                        "duration": end - start,
+                        "thread": threading.get_ident(),
+                        "attrs": attrs,
+                    })
+
+    def incr(self, name: str, value: float = 1):
+        with self._lock:
+            self._counters[name] += value
+
+    @staticmethod
+    def peak_rss_bytes() -> int:
+        """Peak resident memory of this process; 0 where it is not available (Windows)."""
+        try:
+            import resource
+        except ImportError:
+            return 0
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+        return peak if sys.platform == "darwin" else peak * 1024
+
+    def counters(self) -> dict:
+        with self._lock:
+            return dict(self._counters)
+
+    def stage_summary(self) -> dict:
+        import numpy as np
+
+        with self._lock:
+            durations = {name: list(values) for name, values in self._durations.items()}
+            totals = {name: tuple(total) for name, total in self._totals.items()}
+
+        summary = {}
+        for name, values in durations.items():
+            arr = np.asarray(values)
+            count, total = totals[name]
+            summary[name] = {
+                "count": count,
+                "total_seconds": total,
+                "mean_seconds": total / count,
+                "p50_seconds": float(np.percentile(arr, 50)),
+                "p95_seconds": float(np.percentile(arr, 95)),
+                "p99_seconds": float(np.percentile(arr, 99)),
+            }
+        return summary
+
+    def to_trace(self) -> dict:
+        """Chrome trace-event format, viewable in chrome://tracing or Perfetto."""
+        with self._lock:
+            spans = list(self._spans)
+        pid = os.getpid()
+        events = [{
+            "name": span["name"],
+            "ph": "X",
+            "ts": span["start"] * 1e6,
+            "dur": span["duration"] * 1e6,
+            "pid": pid,
+            "tid": span["thread"],
+            "args": span["attrs"],
+        } for span in spans]
+        return {
+            "traceEvents": events,
+            "stages": self.stage_summary(),
+            "counters": self.counters(),
+            "peak_rss_bytes": self.peak_rss_bytes(),
+        }
+
+    def export_json(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_trace(), f, default=str)
+
+    def to_prometheus(self) -> str:
+        lines = [
+            "# HELP cyber_rag_stage_seconds Time spent per pipeline stage.",
+            "# TYPE cyber_rag_stage_seconds summary",
+        ]
+        for name, stats in sorted(self.stage_summary().items()):
+            for quantile, key in (("0.5", "p50_seconds"), ("0.95", "p95_seconds"), ("0.99", "p99_seconds")):
+                lines.append(f'cyber_rag_stage_seconds{{stage="{name}",quantile="{quantile}"}} {stats[key]}')
+            lines.append(f'cyber_rag_stage_seconds_sum{{stage="{name}"}} {stats["total_seconds"]}')
+            lines.append(f'cyber_rag_stage_seconds_count{{stage="{name}"}} {stats["count"]}')
+
+        for name, value in sorted(self.counters().items()):
+            lines.append(f"# TYPE cyber_rag_{name}_total counter")
+            lines.append(f"cyber_rag_{name}_total {value}")
+
+        lines.append("# TYPE cyber_rag_peak_rss_bytes gauge")
+        lines.append(f"cyber_rag_peak_rss_bytes {self.peak_rss_bytes()}")
+        return "\n".join(lines) + "\n"
+
+
+_telemetry: Optional[Telemetry] = None
+_telemetry_lock = threading.Lock()
+
+
+def get_telemetry() -> Telemetry:
+    """Process-wide telemetry shared by the parser, retriever and generator."""
+    global _telemetry
+    with _telemetry_lock:
+        if _telemetry is None:
+            _telemetry = Telemetry()
+        return _telemetry
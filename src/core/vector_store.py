@@ -0,0 +1,406 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+import numpy as np
+
+from src.core.paths import get_cache_dir
+from src.core.telemetry import get_telemetry
+
+logger = logging.getLogger(__name__)
+
+
+class CorpusStore:
+    """
+    Persistent vector store across articles. Chunk embeddings go into an
+    approximate FAISS index (IVF or HNSW, optionally compressed with int8
+    scalar quantisation or PQ) saved under `path`, and chunk/article metadata
+    into SQLite so searches can be filtered by article URL or publication date.
+
+    IVF and compressed indexes need training data; until enough vectors have
+    been ingested they are kept in a small exact "pending" buffer that is
+    searched by brute force, then the index is trained on them.
+
+    Each article's vectors are also written to a journal table in the same
+    SQLite transaction as its metadata, so an article recorded as ingested
+    never loses its vectors: whatever `save()` has not yet written to the
+    index files is replayed from the journal when the store is opened. The
+    index files are named after the last chunk id they hold (their
+    "generation"), so the saved index and the journal position always agree.
+
+    The store records the embedder (`embedder_id`) it was built with and
+    refuses to be used with another one, whose vectors would not be comparable.
+    """
+
+    INDEX_TYPES = ("ivf", "hnsw")
+    COMPRESSIONS = (None, "sq8", "pq")
+
+    def __init__(self,
+                 path: Optional[str] = None,
+                 dim: Optional[int] = None,
+                 index_type: str = "ivf",
+                 compression: Optional[str] = "sq8",
+                 nlist: int = 1024,
+                 hnsw_m: int = 32,
+                 pq_m: int = 16,
+                 nprobe: int = 16,
+                 ef_search: int = 64,
+                 read_only: bool = False,
+                 embedder: Optional[str] = None):
+        self.path = path or get_cache_dir("corpus")
+        os.makedirs(self.path, exist_ok=True)
+        self.read_only = read_only
+        self.telemetry = get_telemetry()
+        self._lock = threading.Lock()
+
+        config_path = os.path.join(self.path, "config.json")
+        if os.path.exists(config_path):
+            # An existing store keeps the layout it was created with
+            with open(config_path, "r", encoding="utf-8") as f:
+                self.config = json.load(f)
+        else:
+            if index_type not in self.INDEX_TYPES:
+                raise ValueError(f"Unknown index type: {index_type}")
+            if compression not in self.COMPRESSIONS:
+                raise ValueError(f"Unknown compression: {compression}")
+            self.config = {"dim": dim, "index_type": index_type, "compression": compression,
+                           "nlist": nlist, "hnsw_m": hnsw_m, "pq_m": pq_m, "embedder": embedder}
+        if embedder is not None:
+            if self.config.get("embedder") is None:
+                # Stores created before the embedder was recorded adopt the current one
+                self.config["embedder"] = embedder
+            elif self.config["embedder"] != embedder:
+                raise ValueError(f"Corpus store {self.path} was built with embedder {self.config['embedder']}, "
+                                 f"not {embedder}; use the same EMBED_BACKEND and model or another --store")
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+
+        self._init_db()
+        self._generation = self._latest_generation()
+        self.index = self._load_index()
+        self._pending_ids, self._pending_vectors = self._load_pending()
+        self._last_chunk_id = self._generation or 0
+        self._replay_journal()
+
+    # ── storage ────────────────────────────────────────────────
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self._file("meta.sqlite3"), timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self):
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS articles ("
+                " id INTEGER PRIMARY KEY,"
+                " url TEXT,"
+                " title TEXT,"
+                " published TEXT,"
+                " content_hash TEXT UNIQUE NOT NULL,"
+                " ingested_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS chunks ("
+                " id INTEGER PRIMARY KEY,"
+                " article_id INTEGER NOT NULL REFERENCES articles (id),"
+                " start_char INTEGER NOT NULL,"
+                " end_char INTEGER NOT NULL,"
+                " text TEXT NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS vector_journal ("
+                " chunk_id INTEGER PRIMARY KEY,"
+                " vector BLOB NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS articles_url ON articles (url)")
+            conn.execute("CREATE INDEX IF NOT EXISTS articles_published ON articles (published)")
+            conn.execute("CREATE INDEX IF NOT EXISTS chunks_article ON chunks (article_id)")
+
+    def _latest_generation(self) -> Optional[int]:
+        """
+        Newest complete save. The pending file is written last, so it marks a
+        generation whose index file is complete too; None for stores saved
+        before generations existed (plain index.faiss / pending_*.npy).
+        """
+        generations = [int(match.group(1)) for name in os.listdir(self.path)
+                       if (match := re.fullmatch(r"pending-(\d+)\.npz", name))]
+        return max(generations, default=None)
+
+    def _load_index(self):
+        import faiss
+
+        index_path = self._file("index.faiss" if self._generation is None else f"index-{self._generation}.faiss")
+        if not os.path.exists(index_path):
+            return None
+        if self.read_only:
+            try:
+                # Memory-map the codes instead of reading them into RAM
+                return faiss.read_index(index_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+            except RuntimeError:
+                logger.info("Index type cannot be memory-mapped, loading it into memory")
+        return faiss.read_index(index_path)
+
+    def _load_pending(self) -> tuple[np.ndarray, np.ndarray]:
+        if self._generation is not None:
+            with np.load(self._file(f"pending-{self._generation}.npz")) as pending:
+                return pending["ids"], pending["vectors"]
+        try:
+            return np.load(self._file("pending_ids.npy")), np.load(self._file("pending_vectors.npy"))
+        except OSError:
+            return np.empty(0, dtype=np.int64), np.empty((0, self.config["dim"] or 0), dtype=np.float32)
+
+    def _replay_journal(self):
+        """Add the journaled vectors of chunks newer than the last `save()`."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT chunk_id, vector FROM vector_journal WHERE chunk_id > ? ORDER BY chunk_id",
+                                (self._generation or 0,)).fetchall()
+        if not rows:
+            return
+        logger.info(f"Replaying {len(rows)} journaled vectors not yet saved to the index")
+        ids = np.asarray([row[0] for row in rows], dtype=np.int64)
+        vectors = np.stack([np.frombuffer(row[1], dtype=np.float32) for row in rows])
+        if self.config["dim"] is None:
+            # Nothing was saved before the crash
+            self.config["dim"] = vectors.shape[1]
+        if not len(self._pending_ids):
+            self._pending_vectors = self._pending_vectors.reshape(0, vectors.shape[1])
+        if self.read_only:
+            # A memory-mapped index cannot be added to; search them exactly instead
+            self._pending_ids = np.concatenate([self._pending_ids, ids])
+            self._pending_vectors = np.concatenate([self._pending_vectors, vectors])
+        else:
+            self._add_vectors(ids, vectors)
+        self._last_chunk_id = max(self._last_chunk_id, int(ids[-1]))
+
+    def save(self):
+        """
+        Write the index and pending buffer as a new generation, then drop the
+        older generation and the journal entries it now holds. A crash
+        part-way leaves the previous generation and the journal in place.
+        """
+        import faiss
+
+        if self.read_only:
+            raise RuntimeError("Corpus store was opened read-only")
+        with self._lock:
+            generation = self._last_chunk_id
+            tmp_path = self._file("config.json.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.config, f)
+            os.replace(tmp_path, self._file("config.json"))
+
+            if self.index is not None:
+                tmp_path = self._file(f"index-{generation}.faiss.tmp")
+                faiss.write_index(self.index, tmp_path)
+                os.replace(tmp_path, self._file(f"index-{generation}.faiss"))
+            # Written last: its presence makes the generation complete
+            tmp_path = self._file(f"pending-{generation}.npz.tmp")
+            with open(tmp_path, "wb") as f:
+                np.savez(f, ids=self._pending_ids, vectors=self._pending_vectors)
+            os.replace(tmp_path, self._file(f"pending-{generation}.npz"))
+
+            for name in os.listdir(self.path):
+                match = re.fullmatch(r"(?:index-(\d+)\.faiss|pending-(\d+)\.npz)", name)
+                stale = (int(match.group(1) or match.group(2)) != generation if match
+                         else name in ("index.faiss", "pending_ids.npy", "pending_vectors.npy"))
+                if stale:
+                    os.remove(self._file(name))
+            self._generation = generation
+
+            with self._connect() as conn:
+                conn.execute("DELETE FROM vector_journal WHERE chunk_id <= ?", (generation,))
+
+    # ── index construction ─────────────────────────────────────
+
+    def _min_training_size(self) -> int:
+        if self.config["index_type"] == "ivf":
+            # faiss recommends ~39 points per centroid
+            return self.config["nlist"] * 39
+        if self.config["compression"] == "pq":
+            return 256 * 39
+        if self.config["compression"] == "sq8":
+            return 1000
+        return 0
+
+    def _new_index(self):
+        import faiss
+
+        dim = self.config["dim"]
+        compression = self.config["compression"]
+        if self.config["index_type"] == "ivf":
+            codec = {None: "Flat", "sq8": "SQ8", "pq": f"PQ{self.config['pq_m']}"}[compression]
+            return faiss.index_factory(dim, f"IVF{self.config['nlist']},{codec}", faiss.METRIC_INNER_PRODUCT)
+
+        codec = {None: "Flat", "sq8": "SQ8", "pq": f"PQ{self.config['pq_m']}"}[compression]
+        hnsw = faiss.index_factory(dim, f"HNSW{self.config['hnsw_m']},{codec}", faiss.METRIC_INNER_PRODUCT)
+        # HNSW does not take external ids by itself
+        return faiss.IndexIDMap2(hnsw)
+
+    def _add_vectors(self, ids: np.ndarray, vectors: np.ndarray):
+        if self.index is None and len(self._pending_ids) + len(ids) < self._min_training_size():
+            self._pending_ids = np.concatenate([self._pending_ids, ids])
+            self._pending_vectors = np.concatenate([self._pending_vectors, vectors])
+            return
+
+        if self.index is None:
+            ids = np.concatenate([self._pending_ids, ids])
+            vectors = np.concatenate([self._pending_vectors, vectors])
+            self._pending_ids = np.empty(0, dtype=np.int64)
+            self._pending_vectors = np.empty((0, self.config["dim"]), dtype=np.float32)
+
+            logger.info(f"Training corpus index on {len(vectors)} vectors")
+            self.index = self._new_index()
+            if not self.index.is_trained:
+                self.index.train(vectors)
+
+        self.index.add_with_ids(vectors, ids)
+
+    # ── public API ─────────────────────────────────────────────
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def add_article(self,
+                    text: str,
+                    chunks: list[str],
+                    spans: list[tuple[int, int]],
+                    embeddings: np.ndarray,
+                    url: Optional[str] = None,
+                    title: Optional[str] = None,
+                    published: Optional[str] = None) -> Optional[int]:
+        """
+        Add one article's chunk embeddings. Returns the new article id, or None
+        if the same text was already ingested. The article is durable once this
+        returns; `save()` writes it into the index files.
+        """
+        if self.read_only:
+            raise RuntimeError("Corpus store was opened read-only")
+
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        if self.config["dim"] is None:
+            self.config["dim"] = embeddings.shape[1]
+            self._pending_vectors = self._pending_vectors.reshape(0, embeddings.shape[1])
+        elif embeddings.shape[1] != self.config["dim"]:
+            raise ValueError(f"Embedding dim {embeddings.shape[1]} does not match the store ({self.config['dim']})")
+
+        content_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        with self._lock, self._connect() as conn:
+            if conn.execute("SELECT 1 FROM articles WHERE content_hash = ?", (content_hash,)).fetchone():
+                return None
+            article_id = conn.execute(
+                "INSERT INTO articles (url, title, published, content_hash, ingested_at) VALUES (?, ?, ?, ?, ?)",
+                (url, title, published, content_hash, time.time()),
+            ).lastrowid
+            ids = []
+            for chunk, (start, end), vector in zip(chunks, spans, embeddings):
+                chunk_id = conn.execute(
+                    "INSERT INTO chunks (article_id, start_char, end_char, text) VALUES (?, ?, ?, ?)",
+                    (article_id, start, end, chunk),
+                ).lastrowid
+                conn.execute("INSERT INTO vector_journal (chunk_id, vector) VALUES (?, ?)",
+                             (chunk_id, vector.tobytes()))
+                ids.append(chunk_id)
+            # Committed together with the rows above when the block exits
+            self._add_vectors(np.asarray(ids, dtype=np.int64), embeddings)
+            self._last_chunk_id = max([self._last_chunk_id] + ids)
+
+        self.telemetry.incr("corpus_chunks_ingested", len(ids))
+        return article_id
+
+    def _allowed_ids(self, url: Optional[str], published_after: Optional[str],
+                     published_before: Optional[str]) -> Optional[np.ndarray]:
+        clauses, params = [], []
+        if url is not None:
+            clauses.append("a.url = ?")
+            params.append(url)
+        if published_after is not None:
+            clauses.append("a.published >= ?")
+            params.append(published_after)
+        if published_before is not None:
+            clauses.append("a.published <= ?")
+            params.append(published_before)
+        if not clauses:
+            return None
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT c.id FROM chunks c JOIN articles a ON a.id = c.article_id WHERE " + " AND ".join(clauses),
+                params,
+            ).fetchall()
+        return np.asarray([row[0] for row in rows], dtype=np.int64)
+
+    def _search_params(self, allowed: Optional[np.ndarray]):
+        import faiss
+
+        selector = faiss.IDSelectorBatch(allowed) if allowed is not None else None
+        if self.config["index_type"] == "ivf":
+            return faiss.SearchParametersIVF(sel=selector, nprobe=self.nprobe)
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=self.ef_search)
+
+    def search(self,
+               q_vecs: np.ndarray,
+               top_k: int = 10,
+               url: Optional[str] = None,
+               published_after: Optional[str] = None,
+               published_before: Optional[str] = None) -> list[list[dict]]:
+        """
+        Search the whole corpus for each query vector, optionally restricted to
+        one article URL or a publication date range (ISO dates compare as text).
+        """
+        q_vecs = np.ascontiguousarray(q_vecs, dtype=np.float32)
+        allowed = self._allowed_ids(url, published_after, published_before)
+        if allowed is not None and len(allowed) == 0:
+            return [[] for _ in range(len(q_vecs))]
+
+        candidates = [[] for _ in range(len(q_vecs))]
+        with self.telemetry.span("corpus_search", queries=len(q_vecs)):
+            if self.index is not None and self.index.ntotal > 0:
+                scores, ids = self.index.search(q_vecs, top_k, params=self._search_params(allowed))
+                for row, (row_scores, row_ids) in enumerate(zip(scores, ids)):
+                    candidates[row].extend((float(s), int(i)) for s, i in zip(row_scores, row_ids) if i >= 0)
+
+            if len(self._pending_ids):
+                mask = np.isin(self._pending_ids, allowed) if allowed is not None else slice(None)
+                pending_ids, pending_vectors = self._pending_ids[mask], self._pending_vectors[mask]
+                if len(pending_ids):
+                    scores = q_vecs @ pending_vectors.T
+                    for row, row_scores in enumerate(scores):
+                        best = np.argsort(-row_scores)[:top_k]
+                        candidates[row].extend((float(row_scores[j]), int(pending_ids[j])) for j in best)
+
+        return [self._hydrate(sorted(hits, reverse=True)[:top_k]) for hits in candidates]
+
+    def _hydrate(self, hits: list[tuple[float, int]]) -> list[dict]:
+        if not hits:
+            return []
+        placeholders = ",".join("?" * len(hits))
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT c.id, c.text, c.start_char, c.end_char, a.id, a.url, a.title, a.published "
+                f"FROM chunks c JOIN articles a ON a.id = c.article_id WHERE c.id IN ({placeholders})",
+                [chunk_id for _, chunk_id in hits],
+            ).fetchall()
+        by_id = {row[0]: row for row in rows}
+        results = []
+        for score, chunk_id in hits:
+            if chunk_id not in by_id:
+                continue
+            _, text, start, end, article_id, url, title, published = by_id[chunk_id]
+            results.append({"score": score, "text": text, "start": start, "end": end,
+                            "article_id": article_id, "url": url, "title": title, "published": published})
+        return results
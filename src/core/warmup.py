@@ -0,0 +1,64 @@
+import logging
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable
+
+from src.core.telemetry import get_telemetry
+
+if TYPE_CHECKING:
+    from src.core.rag_pipeline import RAGPipeline
+
+logger = logging.getLogger(__name__)
+
+
+def preload_llm():
+    """
+    Ask Ollama to load the configured model into memory now, so the first
+    question does not pay the model-load time. An empty prompt only loads the
+    model. WatsonX needs nothing here: its client is opened with the pipeline.
+    With LLM_ENDPOINTS set, every Ollama endpoint of the router is loaded.
+    """
+    from src.llm_api.router import LLMRouter
+
+    targets = [(e.host, e.model) for e in LLMRouter.from_env().endpoints if e.provider == "ollama"]
+    if not targets:
+        return
+    import ollama
+
+    with get_telemetry().span("warmup_llm", provider="ollama"):
+        for host, model in targets:
+            ollama.Client(host=host).generate(model=model, prompt="",
+                                              keep_alive=os.getenv("OLLAMA_KEEP_ALIVE") or None)
+
+
+class Warmup:
+    """
+    Starts the slow resources in the background while the caller fetches and
+    parses the article: the pipeline (embedder, tokenizer, query vectors, LLM
+    client) and the Ollama model load. `pipeline()` blocks only until the
+    pipeline is built; an Ollama request sent before the model finished loading
+    simply waits for it server-side.
+    """
+
+    def __init__(self, pipeline_factory: Callable[[], "RAGPipeline"], preload: bool = True):
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="warmup")
+        self._pipeline: Future = self._executor.submit(self._build, pipeline_factory)
+        self._llm: Future = self._executor.submit(preload_llm) if preload else None
+        if self._llm is not None:
+            self._llm.add_done_callback(self._log_preload_error)
+        # Let the threads finish on their own; nothing waits for shutdown
+        self._executor.shutdown(wait=False)
+
+    @staticmethod
+    def _build(pipeline_factory: Callable[[], "RAGPipeline"]) -> "RAGPipeline":
+        with get_telemetry().span("warmup_pipeline"):
+            return pipeline_factory()
+
+    @staticmethod
+    def _log_preload_error(future: Future):
+        if future.exception() is not None:
+            # Not fatal: the first real request loads the model instead
+            logger.warning(f"Could not preload the LLM: {future.exception()}")
+
+    def pipeline(self) -> "RAGPipeline":
+        return self._pipeline.result()
@@ -8,12 +8,13 @@ load_dotenv()
 LLM_PROVIDER = LLMProviderType(os.getenv("LLM_PROVIDER", LLMProviderType.WATSONX.value))
 
 
-def _get_base_llm_settings(model_name: str, model_parameters: Optional[Dict]) -> Dict:
+def _get_base_llm_settings(model_name: str, model_parameters: Optional[Dict],
+                           provider: Optional[LLMProviderType] = None) -> Dict:
     if model_parameters is None:
         model_parameters = {}
 
 
-    if LLM_PROVIDER == LLMProviderType.WATSONX:
+    if (provider or LLM_PROVIDER) == LLMProviderType.WATSONX:
         parameters = {
             "max_new_tokens": model_parameters.get("max_tokens", 100),
             "decoding_method": model_parameters.get("decoding_method", "greedy"),
@@ -36,14 +37,15 @@ def _get_base_llm_settings(model_name: str, model_parameters: Optional[Dict]) ->
 def get_chat_llm_client(
     model_name: str = "meta-llama/llama-3-3-70b-instruct",
     model_parameters: Optional[Dict] = None,
+    provider: Optional[LLMProviderType] = None,
 ) -> Any:
 
-    if LLM_PROVIDER == LLMProviderType.WATSONX:
+    if (provider or LLM_PROVIDER) == LLMProviderType.WATSONX:
         from langchain_ibm import ChatWatsonx
 
         return ChatWatsonx(
             **_get_base_llm_settings(
-                model_name=model_name, model_parameters=model_parameters
+                model_name=model_name, model_parameters=model_parameters, provider=provider
             )
         )
 
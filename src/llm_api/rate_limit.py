@@ -0,0 +1,53 @@
+import asyncio
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+
+class RateLimiter:
+    """
+    Spaces request starts so that at most `rate` requests per second are sent.
+    The limiter is shared across threads and event loops.
+    """
+
+    def __init__(self, rate: float):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.interval = 1.0 / rate
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+            return slot - now
+
+    def acquire(self):
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+_LIMITERS: Dict[str, Optional[RateLimiter]] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def get_rate_limiter(provider: str) -> Optional[RateLimiter]:
+    """
+    Return the process-wide limiter for a provider, configured with
+    <PROVIDER>_REQUESTS_PER_SECOND (e.g. WATSONX_REQUESTS_PER_SECOND=2).
+    Returns None when no limit is set.
+    """
+    with _LIMITERS_LOCK:
+        if provider not in _LIMITERS:
+            rate = float(os.getenv(f"{provider.upper()}_REQUESTS_PER_SECOND", "0") or 0)
+            _LIMITERS[provider] = RateLimiter(rate) if rate > 0 else None
+        return _LIMITERS[provider]
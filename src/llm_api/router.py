@@ -0,0 +1,353 @@
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Iterator, NamedTuple, Optional
+
+from src.core.telemetry import get_telemetry
+from src.llm_api import get_chat_llm_client
+from src.llm_api.provider_type import LLMProviderType
+from src.llm_api.rate_limit import get_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUTS = {"ollama": 120.0, "watsonx": 60.0}
+
+
+class RouterResult(NamedTuple):
+    text: str
+    endpoint: str
+    prompt_tokens: Optional[int]
+    completion_tokens: Optional[int]
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls for
+    `reset_timeout` seconds; after that calls are let through again (half-open)
+    and the first success closes it, the first failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def allow(self) -> bool:
+        return self.state != "open"
+
+    @property
+    def failures(self) -> int:
+        return self._failures
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class Endpoint:
+    """One provider/model (and host, for Ollama) with its own timeout, breaker and rolling latency."""
+
+    def __init__(self, provider: str, model: str, host: Optional[str] = None,
+                 timeout: Optional[float] = None, window: int = 200):
+        self.provider = provider
+        self.model = model
+        self.host = host
+        self.timeout = timeout or float(os.getenv(f"{provider.upper()}_TIMEOUT", DEFAULT_TIMEOUTS[provider]))
+        self.breaker = CircuitBreaker()
+        self.rate_limiter = get_rate_limiter(provider)
+        self.keep_alive = os.getenv("OLLAMA_KEEP_ALIVE") or None
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        # ollama.AsyncClient is bound to the event loop it was first used on
+        self._ollama_clients = weakref.WeakKeyDictionary()
+        self._ollama_sync_client = None
+        self._watsonx_clients = {}
+
+    @property
+    def name(self) -> str:
+        return f"{self.provider}:{self.model}" + (f"@{self.host}" if self.host else "")
+
+    def record_latency(self, seconds: float):
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def latency_percentile(self, percentile: float, min_samples: int = 1) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._latencies)
+        if len(samples) < min_samples:
+            return None
+        return samples[min(int(len(samples) * percentile / 100), len(samples) - 1)]
+
+    def _watsonx_client(self, max_tokens: Optional[int]):
+        if max_tokens not in self._watsonx_clients:
+            self._watsonx_clients[max_tokens] = get_chat_llm_client(
+                model_name=self.model,
+                model_parameters={"max_tokens": max_tokens} if max_tokens else None,
+                provider=LLMProviderType.WATSONX,
+            )
+        return self._watsonx_clients[max_tokens]
+
+    async def throttle(self):
+        """Wait for the client-side rate limiter; not part of the call's timeout or latency."""
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire_async()
+
+    async def complete(self, prompt: str, system: Optional[str] = None, format: Optional[str] = None,
+                       max_tokens: Optional[int] = None) -> RouterResult:
+        if self.provider == "watsonx":
+            response = await self._watsonx_client(max_tokens).ainvoke(prompt)
+            usage = getattr(response, "usage_metadata", None) or {}
+            return RouterResult(response.content, self.name, usage.get("input_tokens"), usage.get("output_tokens"))
+
+        import ollama
+
+        loop = asyncio.get_running_loop()
+        client = self._ollama_clients.get(loop)
+        if client is None:
+            client = self._ollama_clients[loop] = ollama.AsyncClient(host=self.host, timeout=self.timeout)
+        messages = ([{"role": "system", "content": system}] if system else []) + [{"role": "user", "content": prompt}]
+        response = await client.chat(
+            model=self.model,
+            messages=messages,
+            keep_alive=self.keep_alive,
+            **({"format": format} if format else {})
+        )
+        return RouterResult(response['message']['content'], self.name,
+                            response.get('prompt_eval_count'), response.get('eval_count'))
+
+    def stream(self, prompt: str, system: Optional[str] = None) -> Iterator[RouterResult]:
+        """Yield the answer piece by piece; token counts are set on the pieces that report them."""
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+
+        if self.provider == "watsonx":
+            for chunk in self._watsonx_client(None).stream(prompt):
+                usage = getattr(chunk, "usage_metadata", None) or {}
+                yield RouterResult(chunk.content, self.name, usage.get("input_tokens"), usage.get("output_tokens"))
+            return
+
+        import ollama
+
+        if self._ollama_sync_client is None:
+            self._ollama_sync_client = ollama.Client(host=self.host, timeout=self.timeout)
+        messages = ([{"role": "system", "content": system}] if system else []) + [{"role": "user", "content": prompt}]
+        for chunk in self._ollama_sync_client.chat(model=self.model, messages=messages, stream=True,
+                                                   keep_alive=self.keep_alive):
+            yield RouterResult(chunk['message']['content'], self.name,
+                               chunk.get('prompt_eval_count'), chunk.get('eval_count'))
+
+
+class LLMRouter:
+    """
+    Routes each completion to the fastest healthy endpoint (lowest rolling
+    median latency; endpoints without samples are tried first). Every call has
+    the endpoint's timeout, failures are retried with exponential backoff and
+    jitter, endpoints that keep failing are skipped by their circuit breaker
+    (unless there is no other endpoint), and when the chosen endpoint is slower than its own `hedge_percentile`
+    latency a duplicate request goes to the next endpoint; the first answer wins.
+    """
+
+    def __init__(self, endpoints: list[Endpoint], max_retries: int = 2, backoff: float = 0.5,
+                 hedge_percentile: float = 95, min_hedge_samples: int = 20):
+        if not endpoints:
+            raise ValueError("At least one endpoint is required")
+        self.endpoints = endpoints
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.hedge_percentile = hedge_percentile
+        self.min_hedge_samples = min_hedge_samples
+        self.telemetry = get_telemetry()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "LLMRouter":
+        """
+        Build a router from LLM_ENDPOINTS, a comma-separated list of
+        provider:model[@host] entries, e.g.
+        "ollama:mistral@http://gpu-1:11434,ollama:mistral@http://gpu-2:11434,watsonx:mistralai/mistral-small-3-1-24b-instruct-2503".
+        When it is not set the router has the single LLM_PROVIDER/LLM_MODEL
+        endpoint, which still gets the timeout, retries and circuit breaker.
+        """
+        spec = os.getenv("LLM_ENDPOINTS", "").strip()
+        if not spec:
+            spec = f"{os.getenv('LLM_PROVIDER', 'ollama')}:{os.getenv('LLM_MODEL', 'mistral')}"
+        endpoints = []
+        for entry in filter(None, (part.strip() for part in spec.split(","))):
+            provider, _, model = entry.partition(":")
+            host = None
+            if "@http" in model:
+                model, _, host = model.partition("@")
+            provider = provider.strip().lower()
+            if provider not in DEFAULT_TIMEOUTS or not model:
+                raise ValueError(f"Invalid LLM_ENDPOINTS entry: {entry}")
+            endpoints.append(Endpoint(provider, model, host))
+        return cls(
+            endpoints,
+            max_retries=int(os.getenv("LLM_MAX_RETRIES", "2")),
+            backoff=float(os.getenv("LLM_RETRY_BACKOFF", "0.5")),
+            hedge_percentile=float(os.getenv("LLM_HEDGE_PERCENTILE", "95")),
+        )
+
+    @property
+    def name(self) -> str:
+        return ",".join(endpoint.name for endpoint in self.endpoints)
+
+    def ranked(self, failed: frozenset = frozenset()) -> list[Endpoint]:
+        """
+        Healthy endpoints, fastest first; endpoints that already failed this
+        request or have recent failures go last.
+        """
+        if len(self.endpoints) == 1:
+            # With nowhere to fail over to, an open breaker would only turn a slow endpoint into errors
+            return list(self.endpoints)
+        healthy = [endpoint for endpoint in self.endpoints if endpoint.breaker.allow()]
+        return sorted(healthy, key=lambda endpoint: (endpoint.name in failed, endpoint.breaker.failures,
+                                                     endpoint.latency_percentile(50) or 0.0))
+
+    def _record_failure(self, endpoint: Endpoint, error: Exception):
+        endpoint.breaker.record_failure()
+        self.telemetry.incr("llm_endpoint_failures")
+        logger.warning(f"LLM endpoint {endpoint.name} failed: {error!r}")
+
+    def _backoff_seconds(self, attempt: int) -> float:
+        return self.backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)
+
+    async def _call(self, endpoint: Endpoint, prompt: str, throttled: bool = False, **kwargs) -> RouterResult:
+        if not throttled:
+            await endpoint.throttle()
+        start = time.monotonic()
+        try:
+            result = await asyncio.wait_for(endpoint.complete(prompt, **kwargs), endpoint.timeout)
+        except Exception as e:
+            self._record_failure(endpoint, e)
+            raise
+        endpoint.record_latency(time.monotonic() - start)
+        endpoint.breaker.record_success()
+        return result
+
+    async def _hedged(self, primary: Endpoint, backup: Optional[Endpoint], prompt: str, **kwargs) -> RouterResult:
+        # Throttle before the hedge delay starts, so our own rate limit never triggers a hedge
+        await primary.throttle()
+        primary_task = asyncio.ensure_future(self._call(primary, prompt, throttled=True, **kwargs))
+        delay = (primary.latency_percentile(self.hedge_percentile, self.min_hedge_samples)
+                 if backup is not None else None)
+        if delay is None:
+            return await primary_task
+
+        done, _ = await asyncio.wait({primary_task}, timeout=delay)
+        if done:
+            return primary_task.result()
+
+        self.telemetry.incr("llm_hedged_requests")
+        pending = {primary_task, asyncio.ensure_future(self._call(backup, prompt, **kwargs))}
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    for loser in pending:
+                        loser.cancel()
+                    return task.result()
+                error = task.exception()
+        raise error
+
+    async def acomplete(self, prompt: str, system: Optional[str] = None, format: Optional[str] = None,
+                        max_tokens: Optional[int] = None) -> RouterResult:
+        error = None
+        failed = set()
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.telemetry.incr("llm_retries")
+                await asyncio.sleep(self._backoff_seconds(attempt))
+            candidates = self.ranked(frozenset(failed))
+            if not candidates:
+                error = RuntimeError(f"All LLM endpoints are unavailable: {self.name}")
+                continue
+            backup = candidates[1] if len(candidates) > 1 else None
+            try:
+                return await self._hedged(candidates[0], backup, prompt,
+                                          system=system, format=format, max_tokens=max_tokens)
+            except Exception as e:
+                error = e
+                failed.add(candidates[0].name)
+        raise error
+
+    def _background_loop(self) -> asyncio.AbstractEventLoop:
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="llm-router", daemon=True).start()
+            return self._loop
+
+    def complete(self, prompt: str, **kwargs) -> RouterResult:
+        """
+        Synchronous `acomplete`. Runs on one long-lived event loop so every
+        call reuses the same clients and connections.
+        """
+        return asyncio.run_coroutine_threadsafe(self.acomplete(prompt, **kwargs), self._background_loop()).result()
+
+    def stream(self, prompt: str, system: Optional[str] = None) -> Iterator[RouterResult]:
+        """
+        Stream from the fastest healthy endpoint. A failure before the first
+        piece is retried on another endpoint like `acomplete`; once pieces have
+        been yielded the error is raised. Streams are not hedged.
+        """
+        error = None
+        failed = set()
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.telemetry.incr("llm_retries")
+                time.sleep(self._backoff_seconds(attempt))
+            candidates = self.ranked(frozenset(failed))
+            if not candidates:
+                error = RuntimeError(f"All LLM endpoints are unavailable: {self.name}")
+                continue
+            endpoint = candidates[0]
+            started = False
+            try:
+                for piece in endpoint.stream(prompt, system=system):
+                    started = True
+                    yield piece
+            except Exception as e:
+                self._record_failure(endpoint, e)
+                if started:
+                    raise
+                error = e
+                failed.add(endpoint.name)
+                continue
+            # Stream duration depends on the reader, so it is not a latency sample
+            endpoint.breaker.record_success()
+            return
+        raise error
+
+    def status(self) -> list[dict]:
+        return [{
+            "endpoint": endpoint.name,
+            "state": endpoint.breaker.state,
+            "p50_seconds": endpoint.latency_percentile(50),
+            "p95_seconds": endpoint.latency_percentile(95),
+        } for endpoint in self.endpoints]
@@ -0,0 +1,195 @@
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from io import BytesIO
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _worker_main(conn, max_jobs: int):
+    """
+    Worker loop: build the converter once, then convert HTML documents received
+    over `conn` until `max_jobs` is reached or the pool asks it to stop.
+    """
+    from docling.datamodel.base_models import DocumentStream, InputFormat
+    from docling.document_converter import DocumentConverter
+
+    converter = DocumentConverter()
+    try:
+        converter.initialize_pipeline(InputFormat.HTML)
+    except Exception as e:
+        logger.debug(f"Could not pre-initialise the docling HTML pipeline: {e}")
+
+    for _ in range(max_jobs):
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+
+        name, html = job
+        try:
+            result = converter.convert(source=DocumentStream(name=name, stream=BytesIO(html)))
+            conn.send(("ok", result.document.export_to_markdown(image_placeholder="")))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+    conn.close()
+
+
+class _Worker:
+    def __init__(self, ctx, max_jobs: int):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn, max_jobs), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.jobs_left = max_jobs
+
+    def stop(self, graceful: bool = True):
+        if graceful and self.process.is_alive():
+            try:
+                self.conn.send(None)
+            except OSError:
+                pass
+            self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.conn.close()
+
+
+class DoclingWorkerPool:
+    """
+    Long-lived pool of docling worker processes, each holding a warm
+    DocumentConverter. A job that exceeds its timeout only costs the worker
+    that ran it, which is replaced, and workers are recycled after
+    `max_jobs_per_worker` conversions to cap memory growth.
+    """
+
+    def __init__(self, num_workers: int = 2, max_jobs_per_worker: int = 50, timeout: float = 60):
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.timeout = timeout
+        # Forking a parent that already runs torch and thread pools is unsafe
+        self._ctx = multiprocessing.get_context("spawn")
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        for _ in range(num_workers):
+            self._idle.put(_Worker(self._ctx, max_jobs_per_worker))
+
+    def _acquire(self, cancel_event: Optional[threading.Event]) -> Optional[_Worker]:
+        """Wait for an idle worker; None if the job is cancelled first."""
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+            try:
+                return self._idle.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+    def _release(self, worker: _Worker, healthy: bool):
+        """Return a worker to the pool, replacing it if it is broken or used up."""
+        if healthy:
+            worker.jobs_left -= 1
+            if worker.jobs_left <= 0:
+                # The worker exits on its own after its last job
+                worker.stop()
+                worker = _Worker(self._ctx, self.max_jobs_per_worker)
+        else:
+            worker.stop(graceful=False)
+            worker = _Worker(self._ctx, self.max_jobs_per_worker)
+        self._idle.put(worker)
+
+    def _drain(self, worker: _Worker, deadline: float):
+        """
+        Wait in the background for the reply to a cancelled job, so the warm
+        worker goes back to the pool instead of being killed. It is only
+        restarted if the job also runs past its timeout.
+        """
+        healthy = False
+        try:
+            if worker.conn.poll(max(deadline - time.monotonic(), 0)):
+                worker.conn.recv()
+                healthy = True
+            else:
+                logger.warning("Cancelled docling job exceeded its timeout, restarting its worker")
+        except (EOFError, OSError) as e:
+            logger.warning(f"Docling worker died: {e}")
+        self._release(worker, healthy)
+
+    def convert(self,
+                html: bytes,
+                name: str = "page.html",
+                timeout: Optional[float] = None,
+                cancel_event: Optional[threading.Event] = None) -> Optional[str]:
+        """
+        Convert an HTML document to markdown on the next free worker. Returns
+        None if the conversion fails, times out or is cancelled via `cancel_event`.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        worker = self._acquire(cancel_event)
+        if worker is None:
+            logger.info("Docling job cancelled before it started")
+            return None
+        healthy = False
+        markdown = None
+
+        try:
+            worker.conn.send((name, html))
+            deadline = time.monotonic() + timeout
+            while True:
+                if cancel_event is not None and cancel_event.is_set():
+                    logger.info("Docling job cancelled")
+                    threading.Thread(target=self._drain, args=(worker, deadline),
+                                     name="docling-drain", daemon=True).start()
+                    worker = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.warning(f"Docling job exceeded {timeout}s, restarting its worker")
+                    break
+                if worker.conn.poll(min(remaining, 0.1)):
+                    status, payload = worker.conn.recv()
+                    healthy = True
+                    if status == "ok":
+                        markdown = payload
+                    else:
+                        logger.warning(f"Docling conversion failed: {payload}")
+                    break
+        except (EOFError, OSError) as e:
+            logger.warning(f"Docling worker died: {e}")
+        finally:
+            # A cancelled job's worker stays busy until _drain releases it
+            if worker is not None:
+                self._release(worker, healthy)
+
+        return markdown
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().stop()
+            except queue.Empty:
+                break
+
+
+_default_pool: Optional[DoclingWorkerPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_docling_pool() -> DoclingWorkerPool:
+    """
+    Process-wide pool, sized with DOCLING_WORKERS, DOCLING_MAX_JOBS_PER_WORKER
+    and DOCLING_TIMEOUT.
+    """
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = DoclingWorkerPool(
+                num_workers=int(os.getenv("DOCLING_WORKERS", "2")),
+                max_jobs_per_worker=int(os.getenv("DOCLING_MAX_JOBS_PER_WORKER", "50")),
+                timeout=float(os.getenv("DOCLING_TIMEOUT", "60")),
+            )
+        return _default_pool
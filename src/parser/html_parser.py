@@ -1,59 +1,96 @@
 import base64
-import multiprocessing
 from typing import Optional
 from itertools import chain
-from PIL import Image
-import pytesseract
-from io import BytesIO
 import logging
 import re
-import docling.exceptions
-from docling.document_converter import DocumentConverter
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 
+from src.core.telemetry import get_telemetry
+from src.parser.docling_pool import DoclingWorkerPool, get_docling_pool
+from src.parser.http_fetcher import DEFAULT_HEADERS, HTTPFetcher, get_default_fetcher
+from src.parser.image_ocr import ImageOCRPipeline, ocr_image_bytes
+
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
 class HTMLParser:
-    def __init__(self, url: str, use_ocr: bool = False):
+    # Minimum length for an extraction to count as the article rather than a stub page
+    MIN_CONTENT_CHARS = 500
+    # How long a good BeautifulSoup result waits for docling's (cleaner) output,
+    # as a share of the latency budget
+    DOCLING_GRACE_FRACTION = 0.5
+    # Sentences glued to the next one ("...server.The loader") per 1000
+    # characters above which an extraction counts as run-together text
+    MAX_GLUED_SENTENCES_PER_1K = 1.0
+
+    def __init__(self, url: str, use_ocr: bool = False,
+                 fetcher: Optional[HTTPFetcher] = None,
+                 docling_pool: Optional[DoclingWorkerPool] = None,
+                 extraction_strategy: str = "hedged",
+                 latency_budget: float = 60,
+                 docling_grace: Optional[float] = None):
+        if extraction_strategy not in ("hedged", "sequential"):
+            raise ValueError(f"Unknown extraction strategy: {extraction_strategy}")
         self.url = url
-        self.converter = DocumentConverter()
+        self.extraction_strategy = extraction_strategy
+        self.latency_budget = latency_budget
+        self.docling_grace = latency_budget * self.DOCLING_GRACE_FRACTION if docling_grace is None else docling_grace
+        # Docling runs in a shared pool of warm worker processes
+        self.docling_pool = docling_pool or get_docling_pool()
+        self.fetcher = fetcher or get_default_fetcher()
         self.use_ocr: bool = use_ocr
-        self.headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3"
-        }
+        self.telemetry = get_telemetry()
+        self.ocr_pipeline = ImageOCRPipeline() if use_ocr else None
+        self.headers = dict(DEFAULT_HEADERS)
+        self._page_html: Optional[bytes] = None
 
-    def extract_text_from_image(self, image_src: str) -> str:
-        img = None
+    def _get_page_html(self) -> bytes:
+        # The page is downloaded once and shared by docling, BeautifulSoup and OCR
+        if self._page_html is None:
+            self._page_html = self.fetcher.fetch(self.url, headers=self.headers).content
+        return self._page_html
 
-        # Load image from URL
-        if image_src.startswith('http'):
-            response = requests.get(image_src)
-            if response.status_code == 200 and 'image' in response.headers.get('Content-Type', ''):
-                img = Image.open(BytesIO(response.content))
-            else:
+    def _load_image_bytes(self, image_src: str) -> Optional[bytes]:
+        try:
+            # Load image from URL
+            if image_src.startswith('http'):
+                response = self.fetcher.get(image_src)
+                if response.status_code == 200 and 'image' in response.headers.get('Content-Type', ''):
+                    return response.content
                 content_type = response.headers.get('Content-Type')
                 logger.info(
                     f"Skipped: {image_src} (status: {response.status_code}, content-type: {content_type})")
 
-        # Load from base64 (optional enhancement)
-        elif image_src.startswith('data:image'):
-            base64_data = image_src.split(",")[1]
-            img = Image.open(BytesIO(base64.b64decode(base64_data)))
+            # Load from base64 (optional enhancement)
+            elif image_src.startswith('data:image'):
+                base64_data = image_src.split(",")[1]
+                return base64.b64decode(base64_data)
 
-        elif len(self._overlap_with_base_url(image_src)) > 0:
-            response = requests.get(urljoin(self.url, image_src))
-            img = Image.open(BytesIO(response.content))
-        else:
-            logger.info(f"Unsupported image src format: {image_src}")
+            elif len(self._overlap_with_base_url(image_src)) > 0:
+                response = self.fetcher.get(urljoin(self.url, image_src))
+                if response.status_code == 200:
+                    return response.content
+                logger.info(f"Skipped: {image_src} (status: {response.status_code})")
+            else:
+                logger.info(f"Unsupported image src format: {image_src}")
+        except Exception as e:
+            logger.info(f"Failed to load image {image_src}: {e}")
+        return None
+
+    def extract_text_from_image(self, image_src: str) -> str:
+        data = self._load_image_bytes(image_src)
+        if data is None:
+            return ""
 
         # OCR on the image
-        text = pytesseract.image_to_string(img)
-        return text
+        return ocr_image_bytes(data)
 
     def _overlap_with_base_url(self, img_url: str) -> str:
         max_len = min(len(self.url), len(img_url))
@@ -72,25 +109,20 @@ class HTMLParser:
             return picture_tag.get('src')
 
     def _extract_text_from_images_in_html(self, soup_obj: BeautifulSoup) -> str:
-        res = []
+        sources = []
         img_tags = soup_obj.find_all('img')
         picture_tags = soup_obj.find_all('picture')
         combined_tags = chain(
             zip(picture_tags, ['picture_tag'] * len(picture_tags)),
             zip(img_tags, ['image_tag'] * len(img_tags))
         )
-        for i, (tag, html_type) in enumerate(combined_tags):
+        for tag, html_type in combined_tags:
             src = self._extract_image_src(tag, html_type)
+            if src:
+                sources.append(src)
 
-            if not src:
-                continue
-
-            try:
-                text = self.extract_text_from_image(image_src=src)
-                res.append(text)
-            except Exception as e:
-                logger.info(f"Failed to process image {i} ({src}): {e}")
-        return ''.join(res)
+        ocr_pipeline = self.ocr_pipeline or ImageOCRPipeline()
+        return ocr_pipeline.extract_text(sources, self._load_image_bytes)
 
     @staticmethod
     def _extract_article_content_from_markdown(markdown: str) -> str:
@@ -102,9 +134,7 @@ class HTMLParser:
         return markdown
 
     def _manually_fetch_blog_html_content(self) -> str:
-        response = requests.get(self.url, headers=self.headers)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, "html.parser")
+        soup = BeautifulSoup(self._get_page_html(), "html.parser")
 
         # Remove common irrelevant elements
         for element in soup(["script", "style", "footer", "header", "nav"]):
@@ -117,31 +147,27 @@ class HTMLParser:
         ):
             element.extract()
 
-        # Extract the remaining text content
-        return soup.get_text(strip=True)
+        # Extract the remaining text content, one text node per line
+        return soup.get_text("\n", strip=True)
 
     def _extract_textual_content_with_docling(
-        self, result_queue: multiprocessing.Queue
-    ):
+        self, cancel_event: Optional[threading.Event] = None
+    ) -> Optional[str]:
         logger.info("Attempting to extract HTML data using docling")
-        try:
-            conversion_result = self.converter.convert(source=self.url)
-            markdown = conversion_result.document.export_to_markdown(
-                image_placeholder=""
-            )
-            if markdown:
-                result_queue.put(self._extract_article_content_from_markdown(markdown))
-                return
-        except docling.exceptions.ConversionError:
-            logger.warning("Failed to extract blog content using docling")
-        result_queue.put(None)
+        markdown = self.docling_pool.convert(
+            self._get_page_html(),
+            timeout=min(self.latency_budget, self.docling_pool.timeout),
+            cancel_event=cancel_event,
+        )
+        if markdown:
+            return self._extract_article_content_from_markdown(markdown)
+        logger.warning("Failed to extract blog content using docling")
+        return None
 
     def _fetch_ocr_data_with_beautifulsoup(self) -> Optional[str]:
         logger.info("Attempting to extract text from images using BeautifulSoup")
         try:
-            response = requests.get(self.url, headers=self.headers)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.content, "html.parser")
+            soup = BeautifulSoup(self._get_page_html(), "html.parser")
 
             image_text_str = self._extract_text_from_images_in_html(soup)
             return image_text_str.strip()
@@ -157,30 +183,82 @@ class HTMLParser:
             logger.warning(f"Failed to extract blog content using BeautifulSoup: {e}")
         return None
 
+    def _passes_quality_check(self, content: Optional[str], require_title: bool = False) -> bool:
+        if not content or len(content) < self.MIN_CONTENT_CHARS:
+            return False
+        # Docling output is trimmed to start at the article's title heading
+        if require_title and not re.search(r"(^|\n)# ", content):
+            return False
+        # Text nodes joined without separators read as one garbled paragraph
+        glued = len(re.findall(r"[a-z0-9][.!?][A-Z][a-z]", content))
+        if glued > 2 and glued * 1000 / len(content) > self.MAX_GLUED_SENTENCES_PER_1K:
+            return False
+        return True
+
+    def _extract_textual_content_hedged(self) -> Optional[str]:
+        """
+        Run docling and BeautifulSoup at the same time and keep the best result
+        available within the latency budget, cancelling docling if it loses.
+        """
+        cancel_event = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="extract")
+        pending = {
+            executor.submit(self._extract_textual_content_with_docling, cancel_event): "docling",
+            executor.submit(self._extract_textual_content_with_beautifulsoup): "beautifulsoup",
+        }
+        results = {}
+        deadline = time.monotonic() + self.latency_budget
+
+        try:
+            while pending:
+                done, _ = wait(pending, timeout=max(deadline - time.monotonic(), 0),
+                               return_when=FIRST_COMPLETED)
+                if not done:
+                    logger.warning("Extraction latency budget exhausted")
+                    break
+                for future in done:
+                    name = pending.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except Exception as e:
+                        logger.warning(f"{name} extraction failed: {e}")
+                        results[name] = None
+
+                if self._passes_quality_check(results.get("docling"), require_title=True):
+                    break
+                if "docling" not in results and self._passes_quality_check(results.get("beautifulsoup")):
+                    deadline = min(deadline, time.monotonic() + self.docling_grace)
+        finally:
+            cancel_event.set()
+            executor.shutdown(wait=False)
+
+        docling_content = results.get("docling")
+        bs_content = results.get("beautifulsoup")
+        if self._passes_quality_check(docling_content, require_title=True):
+            return docling_content
+        if self._passes_quality_check(bs_content):
+            logger.info("Using BeautifulSoup extraction")
+            return bs_content
+        return docling_content or bs_content
+
     def get_textual_content(self) -> Optional[str]:
-        use_multi_proccesing = True
-        if use_multi_proccesing:
-            result_queue = multiprocessing.Queue(maxsize=1)
-            process = multiprocessing.Process(
-                target=self._extract_textual_content_with_docling, args=(result_queue,)
-            )
-            process.start()
-            process.join(timeout=60)
-
-            if process.is_alive():
-                logger.warning(
-                    "Docling extraction is taking too long, falling back to BeautifulSoup"
-                )
-                process.terminate()
-                process.join()
-
-            content = result_queue.get() if not result_queue.empty() else None
-        else:
-            content = None
-        if content is None:
-            content = self._extract_textual_content_with_beautifulsoup()
+        try:
+            # Download once up front; docling, BeautifulSoup and OCR share the bytes
+            self._get_page_html()
+        except requests.RequestException as e:
+            logger.error(f"Failed to fetch blog page: {e}")
+            return None
+
+        with self.telemetry.span("parse", strategy=self.extraction_strategy):
+            if self.extraction_strategy == "hedged":
+                content = self._extract_textual_content_hedged()
+            else:
+                content = self._extract_textual_content_with_docling()
+                if content is None:
+                    content = self._extract_textual_content_with_beautifulsoup()
         if self.use_ocr:
-            ocr_text = self._fetch_ocr_data_with_beautifulsoup()
+            with self.telemetry.span("ocr"):
+                ocr_text = self._fetch_ocr_data_with_beautifulsoup()
             content = content + ocr_text if content else ocr_text
         if content:
             return content
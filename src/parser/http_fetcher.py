@@ -0,0 +1,181 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from src.core.paths import get_cache_dir
+from src.core.telemetry import get_telemetry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3"
+}
+
+
+class FetchedPage(NamedTuple):
+    url: str
+    content: bytes
+    content_type: str
+
+
+class HTTPFetcher:
+    """
+    Shared HTTP layer for the parsers: a pooled `requests.Session`, a short
+    in-memory memo so concurrent or back-to-back requests for a page share one
+    download, and an on-disk cache revalidated with ETag / Last-Modified
+    conditional GETs. Memo entries expire after `memo_ttl` seconds, so a
+    long-lived fetcher (batch, serve) revalidates a page it is asked for again.
+    """
+
+    def __init__(self,
+                 cache_dir: Optional[str] = None,
+                 use_disk_cache: bool = True,
+                 timeout: tuple[float, float] = (10, 30),
+                 pool_size: int = 16,
+                 memo_size: int = 64,
+                 memo_ttl: float = 30):
+        self.timeout = timeout
+        self.use_disk_cache = use_disk_cache
+        self.cache_dir = cache_dir or (get_cache_dir("http") if use_disk_cache else None)
+        self.memo_size = memo_size
+        self.memo_ttl = memo_ttl
+        # url -> (page, monotonic time it was downloaded)
+        self._memo: "OrderedDict[str, tuple[FetchedPage, float]]" = OrderedDict()
+        self._memo_lock = threading.Lock()
+        self._url_locks: dict[str, threading.Lock] = {}
+
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        retries = Retry(total=2, backoff_factor=0.5, status_forcelist=[502, 503, 504],
+                        allowed_methods=["GET", "HEAD"])
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """Plain GET over the pooled session, e.g. for images."""
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.get(url, **kwargs)
+
+    def fetch(self, url: str, headers: Optional[dict] = None) -> FetchedPage:
+        """
+        Return the page body, downloading it only if it is not in the memo (or
+        its memo entry expired) and revalidating any on-disk copy. Raises
+        `requests.HTTPError` on error status codes.
+        """
+        with self._memo_lock:
+            page = self._memo_get(url)
+            if page is not None:
+                get_telemetry().incr("http_memo_hits")
+                return page
+            url_lock = self._url_locks.setdefault(url, threading.Lock())
+
+        # Concurrent callers for the same URL wait for a single download
+        with url_lock:
+            with self._memo_lock:
+                page = self._memo_get(url)
+                if page is not None:
+                    return page
+
+            page = self._download(url, headers)
+
+            with self._memo_lock:
+                self._memo[url] = (page, time.monotonic())
+                if len(self._memo) > self.memo_size:
+                    self._memo.popitem(last=False)
+                self._url_locks.pop(url, None)
+        return page
+
+    def _memo_get(self, url: str) -> Optional[FetchedPage]:
+        """Fresh memo entry for `url`, if any. Call with `_memo_lock` held."""
+        entry = self._memo.get(url)
+        if entry is None:
+            return None
+        page, fetched_at = entry
+        if time.monotonic() - fetched_at > self.memo_ttl:
+            del self._memo[url]
+            return None
+        self._memo.move_to_end(url)
+        return page
+
+    def _cache_paths(self, url: str) -> tuple[str, str]:
+        base = os.path.join(self.cache_dir, hashlib.sha256(url.encode("utf-8")).hexdigest())
+        return base + ".json", base + ".body"
+
+    def _load_cached(self, url: str) -> tuple[Optional[dict], Optional[bytes]]:
+        if not self.use_disk_cache:
+            return None, None
+        meta_path, body_path = self._cache_paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                return meta, f.read()
+        except (OSError, ValueError):
+            return None, None
+
+    def _store_cached(self, url: str, response: requests.Response):
+        if not self.use_disk_cache:
+            return
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            # Nothing to revalidate against, so a cached copy would never be reused
+            return
+
+        meta_path, body_path = self._cache_paths(url)
+        meta = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "content_type": response.headers.get("Content-Type", ""),
+        }
+        try:
+            with open(body_path, "wb") as f:
+                f.write(response.content)
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+        except OSError as e:
+            logger.warning(f"Could not write HTTP cache entry for {url}: {e}")
+
+    def _download(self, url: str, headers: Optional[dict]) -> FetchedPage:
+        request_headers = dict(headers or {})
+        meta, body = self._load_cached(url)
+        if meta is not None:
+            if meta.get("etag"):
+                request_headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                request_headers["If-Modified-Since"] = meta["last_modified"]
+
+        with get_telemetry().span("fetch", url=url):
+            response = self.session.get(url, headers=request_headers, timeout=self.timeout)
+        if response.status_code == 304 and body is not None:
+            logger.info(f"HTTP cache revalidated: {url}")
+            get_telemetry().incr("http_cache_hits")
+            return FetchedPage(url, body, meta.get("content_type", ""))
+
+        response.raise_for_status()
+        self._store_cached(url, response)
+        return FetchedPage(url, response.content, response.headers.get("Content-Type", ""))
+
+
+_default_fetcher: Optional[HTTPFetcher] = None
+_default_fetcher_lock = threading.Lock()
+
+
+def get_default_fetcher() -> HTTPFetcher:
+    """Process-wide fetcher shared by all parsers."""
+    global _default_fetcher
+    with _default_fetcher_lock:
+        if _default_fetcher is None:
+            _default_fetcher = HTTPFetcher()
+        return _default_fetcher
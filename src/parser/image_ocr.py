@@ -0,0 +1,137 @@
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from io import BytesIO
+from typing import Callable, Optional
+
+from src.core.paths import get_cache_dir
+from src.core.telemetry import get_telemetry
+
+logger = logging.getLogger(__name__)
+
+
+def ocr_image_bytes(data: bytes) -> str:
+    # Also runs in the OCR worker processes; the imaging libraries load only with OCR
+    import pytesseract
+    from PIL import Image
+
+    with Image.open(BytesIO(data)) as img:
+        return pytesseract.image_to_string(img)
+
+
+_ocr_executor: Optional[ProcessPoolExecutor] = None
+_ocr_executor_lock = threading.Lock()
+
+
+def _get_ocr_executor() -> ProcessPoolExecutor:
+    global _ocr_executor
+    with _ocr_executor_lock:
+        if _ocr_executor is None:
+            _ocr_executor = ProcessPoolExecutor(
+                max_workers=int(os.getenv("OCR_WORKERS", str(os.cpu_count() or 2))),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _ocr_executor
+
+
+class ImageOCRPipeline:
+    """
+    OCR stage for article images: downloads concurrently, drops duplicates
+    (by content hash), icons and tracking pixels, reuses OCR text cached on
+    disk by image hash, and runs tesseract on the rest in a process pool.
+    """
+
+    def __init__(self,
+                 download_workers: int = 8,
+                 min_bytes: int = 2048,
+                 min_width: int = 50,
+                 min_height: int = 50,
+                 min_area: int = 40_000,
+                 cache_dir: Optional[str] = None):
+        self.download_workers = download_workers
+        self.min_bytes = min_bytes
+        self.min_width = min_width
+        self.min_height = min_height
+        self.min_area = min_area
+        self.cache_dir = cache_dir or get_cache_dir("ocr")
+
+    def _is_worth_ocr(self, src: str, data: bytes) -> bool:
+        if len(data) < self.min_bytes:
+            logger.info(f"Skipped small image: {src} ({len(data)} bytes)")
+            return False
+        from PIL import Image
+
+        try:
+            # Only the header is parsed here, not the pixel data
+            with Image.open(BytesIO(data)) as img:
+                width, height = img.size
+        except Exception as e:
+            logger.info(f"Skipped unreadable image: {src} ({e})")
+            return False
+        if width < self.min_width or height < self.min_height or width * height < self.min_area:
+            logger.info(f"Skipped small image: {src} ({width}x{height})")
+            return False
+        return True
+
+    def _cache_path(self, image_hash: str) -> str:
+        return os.path.join(self.cache_dir, f"{image_hash}.txt")
+
+    def _cached_text(self, image_hash: str) -> Optional[str]:
+        try:
+            with open(self._cache_path(image_hash), "r", encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _store_text(self, image_hash: str, text: str):
+        try:
+            with open(self._cache_path(image_hash), "w", encoding="utf-8") as f:
+                f.write(text)
+        except OSError as e:
+            logger.warning(f"Could not write OCR cache entry {image_hash}: {e}")
+
+    def extract_text(self, sources: list[str], load_image: Callable[[str], Optional[bytes]]) -> str:
+        """
+        OCR the images behind `sources` (in document order) using `load_image`
+        to fetch their bytes, and return the concatenated text.
+        """
+        unique_sources = list(dict.fromkeys(sources))
+        if not unique_sources:
+            return ""
+
+        with ThreadPoolExecutor(max_workers=self.download_workers, thread_name_prefix="image") as pool:
+            downloads = list(pool.map(load_image, unique_sources))
+
+        # Keep the first occurrence of each distinct image
+        images: dict[str, bytes] = {}
+        for src, data in zip(unique_sources, downloads):
+            if data is None or not self._is_worth_ocr(src, data):
+                continue
+            images.setdefault(hashlib.sha256(data).hexdigest(), data)
+
+        texts: dict[str, str] = {}
+        pending = {}
+        for image_hash, data in images.items():
+            cached = self._cached_text(image_hash)
+            if cached is not None:
+                texts[image_hash] = cached
+            else:
+                pending[image_hash] = _get_ocr_executor().submit(ocr_image_bytes, data)
+
+        for image_hash, future in pending.items():
+            try:
+                texts[image_hash] = future.result()
+            except Exception as e:
+                logger.info(f"Failed to OCR image {image_hash}: {e}")
+                continue
+            self._store_text(image_hash, texts[image_hash])
+
+        telemetry = get_telemetry()
+        telemetry.incr("ocr_images", len(pending))
+        telemetry.incr("ocr_cache_hits", len(images) - len(pending))
+        logger.info(f"OCR: {len(unique_sources)} images, {len(images)} distinct, "
+                    f"{len(images) - len(pending)} from cache")
+        return "".join(texts[image_hash] for image_hash in images if image_hash in texts)
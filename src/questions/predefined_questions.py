@@ -1,5 +1,12 @@
+import hashlib
 import json
+import logging
 import os
+from typing import Callable, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
 
 
 def load_predefined_questions(path=None) -> dict:
@@ -10,4 +17,31 @@ def load_predefined_questions(path=None) -> dict:
         raise FileNotFoundError(f"Could not find: {path}")
 
     with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
\ No newline at end of file
+        return json.load(f)
+
+
+def load_query_embeddings(queries: list[str],
+                          model_name: str,
+                          encode: Callable[[list[str]], np.ndarray],
+                          path: Optional[str] = None) -> np.ndarray:
+    """
+    Load the embeddings of the predefined queries from a precompiled artifact,
+    building it with `encode` the first time. The artifact name is derived from
+    the model and the query texts, so editing questions.json or switching
+    models never picks up stale vectors.
+    """
+    if path is None:
+        key = hashlib.sha256("\n".join([model_name, *queries]).encode("utf-8")).hexdigest()[:16]
+        path = os.path.join(os.path.dirname(__file__), f"query_embeddings_{key}.npy")
+
+    if os.path.exists(path):
+        embeddings = np.load(path)
+        if embeddings.shape[0] == len(queries):
+            return embeddings
+
+    embeddings = np.asarray(encode(queries), dtype=np.float32)
+    try:
+        np.save(path, embeddings)
+    except OSError as e:
+        logger.warning(f"Could not save query embeddings to {path}: {e}")
+    return embeddings
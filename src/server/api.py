@@ -0,0 +1,136 @@
+import json
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from src.core.batch import BatchRunner
+from src.core.telemetry import get_telemetry
+
+logger = logging.getLogger(__name__)
+
+
+class JobStore:
+    """
+    Tracks jobs submitted to the server. Finished jobs beyond `max_jobs` are
+    forgotten oldest-first.
+    """
+
+    def __init__(self, runner: BatchRunner, max_jobs: int = 1000):
+        self.runner = runner
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, dict]" = OrderedDict()
+        self._futures: dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, url: Optional[str] = None, text: Optional[str] = None) -> tuple[str, Future]:
+        job_id = uuid.uuid4().hex
+        future = self.runner.submit(url=url, text=text)
+        with self._lock:
+            self._jobs[job_id] = {"job_id": job_id, "url": url, "status": "running"}
+            self._futures[job_id] = future
+            self._trim()
+        future.add_done_callback(lambda done: self._finish(job_id, done.result()))
+        return job_id, future
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def _finish(self, job_id: str, record: dict):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id] = {"job_id": job_id, **record}
+            self._futures.pop(job_id, None)
+
+    def _trim(self):
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.max_jobs:
+                break
+            if job_id not in self._futures:
+                del self._jobs[job_id]
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    jobs: JobStore = None
+
+    def _send_body(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, payload: dict):
+        self._send_body(status, json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json")
+
+    def log_message(self, format, *args):
+        logger.info(f"{self.address_string()} {format % args}")
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        elif self.path == "/metrics":
+            self._send_body(200, get_telemetry().to_prometheus().encode("utf-8"),
+                            "text/plain; version=0.0.4")
+        elif self.path.startswith("/jobs/"):
+            job = self.jobs.get(self.path[len("/jobs/"):])
+            if job is None:
+                self._send_json(404, {"error": "Unknown job"})
+            else:
+                self._send_json(200, job)
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        if self.path != "/jobs":
+            self._send_json(404, {"error": "Not found"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": "Request body must be JSON"})
+            return
+        if not isinstance(payload, dict):
+            self._send_json(400, {"error": "Request body must be a JSON object"})
+            return
+
+        url, text = payload.get("url"), payload.get("text")
+        if not url and not text:
+            self._send_json(400, {"error": "Provide either 'url' or 'text'"})
+            return
+
+        job_id, future = self.jobs.submit(url=url, text=text)
+        if payload.get("wait"):
+            # Synchronous mode: answer in the same response. Built from the
+            # result itself, since the job record is updated by a done-callback
+            # that may not have run yet (or the job may already be trimmed)
+            self._send_json(200, {"job_id": job_id, **future.result()})
+        else:
+            self._send_json(202, {"job_id": job_id, "status": "running"})
+
+
+def serve(runner: BatchRunner, host: str = "127.0.0.1", port: int = 8080):
+    """
+    Serve the pipeline over HTTP until interrupted:
+
+    - POST /jobs    {"url": ...} or {"text": ...}, optionally "wait": true
+    - GET  /jobs/ID job status and, once done, its answers
+    - GET  /metrics Prometheus text metrics
+    - GET  /health
+    """
+    handler = type("RequestHandler", (_RequestHandler,), {"jobs": JobStore(runner)})
+    server = ThreadingHTTPServer((host, port), handler)
+    logger.info(f"cyber-rag server listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
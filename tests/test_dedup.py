@@ -0,0 +1,55 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from src.core.dedup import ChunkDeduplicator  # noqa: E402
+
+# BeautifulSoup's get_text(strip=True) output: no newlines, sentences glued together
+IOC_PARAGRAPH = (
+    "The loader was delivered through a malicious ISO attachment that drops a signed binary and a sideloaded DLL. "
+    "Once running, the DLL decrypts its configuration with a hardcoded RC4 key and contacts its command-and-control "
+    "server at 185.220.101.47 over HTTPS on port 8443, falling back to update-check.cdn-sync.net when the primary "
+    "server is unreachable. Persistence is achieved with a scheduled task named OneDriveUpdater that runs every "
+    "fifteen minutes. Collected files are compressed into a password-protected archive and uploaded to "
+    "hxxps://files.cdn-sync[.]net/upload with a POST request. The SHA-256 hash of the dropper is "
+    "3f1c9a2b7d4e8f60a1b2c3d4e5f60718293a4b5c6d7e8f90a1b2c3d4e5f60718, and the DLL is signed with a stolen "
+    "certificate issued to a small software vendor. We attribute the activity with moderate confidence to the "
+    "same operator that ran last year's campaign against logistics companies.Share on Twitter"
+)
+
+INFOSTEALER_PARAGRAPH = (
+    "The infostealer enumerates every Chromium profile on the host and copies the Cookies and Login Data "
+    "databases to a temporary folder. It decrypts the stored values with the DPAPI master key and also reads the "
+    "browser's cookie settings to find sites where session cookies are kept after the browser closes. The stolen "
+    "session tokens are then sent to the operator, who uses them to bypass multi-factor authentication."
+)
+
+
+def test_newline_free_article_text_is_kept():
+    dedup = ChunkDeduplicator()
+    keep, removed = dedup.filter([IOC_PARAGRAPH, INFOSTEALER_PARAGRAPH])
+    assert keep == [0, 1]
+    assert removed["boilerplate"] == 0
+
+
+def test_newline_free_page_furniture_is_dropped():
+    furniture = ("Share on TwitterShare on LinkedIn.Follow us on X.Subscribe to our newsletter.We use cookies to "
+                 "improve your experience.Accept all cookies.© 2024 Example Security. All rights reserved.")
+    keep, removed = ChunkDeduplicator().filter([IOC_PARAGRAPH, furniture])
+    assert keep == [0]
+    assert removed["boilerplate"] == 1
+
+
+def test_line_based_boilerplate_is_dropped():
+    footer = "Home | Blog | Research\nShare this\nCookie settings\nPrivacy policy and terms of use"
+    keep, removed = ChunkDeduplicator().filter([INFOSTEALER_PARAGRAPH, footer])
+    assert keep == [0]
+    assert removed["boilerplate"] == 1
+
+
+def test_duplicates_are_dropped():
+    near = INFOSTEALER_PARAGRAPH + " Two of them were cloud admins."
+    keep, removed = ChunkDeduplicator().filter([INFOSTEALER_PARAGRAPH, INFOSTEALER_PARAGRAPH, near])
+    assert keep == [0]
+    assert removed["exact"] == 1
+    assert removed["near"] == 1